@@ -9,14 +9,20 @@ from app.src.embeddings.handle_commands import (
     handle_delete_command,
     handle_purge_command,
     handle_list_command,
+    handle_stats_command,
+    handle_export_command,
+    handle_import_command,
+    handle_compact_command,
 )
 from app.src.core.permissions import permission_manager
+from app.src.embeddings.filters import parse_filters
 from app.src.core.agent_factory import AgentFactory
 from app.src.helpers.valid_dir import validate_dir_name
 from app.utils.ascii_art import ASCII_ART
 from app.src.core.base import BaseAgent
 from app.src.cli.flags import ArgsParser
 from app.src.core.ui import default_ui
+import threading
 import textwrap
 import sys
 import os
@@ -34,19 +40,25 @@ class CLI:
         api_key_per_model: dict[str, str] = None,
         embedding_provider: str = None,
         embedding_model: str = None,
+        embedding_options: dict = None,
         temperatures: dict[str, float] = None,
         system_prompts: dict[str, str] = None,
         scraping_method: str = "simple",
+        context_window: int = None,
         stream: bool = True,
     ):
         self.stream = stream
         self.ui = default_ui
+        self.context_window = int(context_window) if context_window else None
 
         models = models or {}
         api_key_per_model = api_key_per_model or {}
         temperatures = temperatures or {}
         system_prompts = system_prompts or {}
         provider_per_model = provider_per_model or {}
+        embedding_options = embedding_options or {}
+
+        self.embedder = None
 
         match embedding_provider.lower():
 
@@ -55,13 +67,15 @@ class CLI:
                     OllamaEmbedder,
                 )
 
-                self.embedding_function = OllamaEmbedder(embedding_model).get_embeddings
+                self.embedder = OllamaEmbedder(embedding_model, **embedding_options)
+                self.embedding_function = self.embedder.get_embeddings
                 self.rag_available = True
 
             case "hf" | "huggingface" | "hugging face" | "hugging_face":
                 from app.src.embeddings.embedding_functions.hf_embed import HFEmbedder
 
-                self.embedding_function = HFEmbedder(embedding_model).get_embeddings
+                self.embedder = HFEmbedder(embedding_model, **embedding_options)
+                self.embedding_function = self.embedder.get_embeddings
                 self.rag_available = True
 
             case "openai":
@@ -69,7 +83,8 @@ class CLI:
                     OpenAIEmbedder,
                 )
 
-                self.embedding_function = OpenAIEmbedder(embedding_model).get_embeddings
+                self.embedder = OpenAIEmbedder(embedding_model)
+                self.embedding_function = self.embedder.get_embeddings
                 self.rag_available = True
 
             case "nlpcloud" | "nlp cloud" | "nlp_cloud":
@@ -77,9 +92,8 @@ class CLI:
                     NLPCloudEmbedder,
                 )
 
-                self.embedding_function = NLPCloudEmbedder(
-                    embedding_model
-                ).get_embeddings
+                self.embedder = NLPCloudEmbedder(embedding_model)
+                self.embedding_function = self.embedder.get_embeddings
                 self.rag_available = True
 
             case _:
@@ -112,6 +126,9 @@ class CLI:
                     "provider": provider_per_model.get("web_searcher") or provider,
                 },
             )
+            self._apply_context_window(
+                self.general_agent, self.default_web_searcher_agent
+            )
         except Exception as e:
             logger.error(f"Failed to initialize default agents: {e}", exc_info=e)
             self.ui.error(UI_MESSAGES["errors"]["failed_initialize_agents"])
@@ -250,9 +267,8 @@ class CLI:
             if self.rag_available:
                 from app.src.embeddings.db_client import DataBaseClient
 
-                _ = DataBaseClient(
-                    embedding_function=self.embedding_function, scraper=self.scraper
-                )
+                db_client = DataBaseClient(embedder=self.embedder, scraper=self.scraper)
+                self._warm_up_embedder(db_client)
 
             self._integrate_rag(agent=self.general_agent, available=self.rag_available)
 
@@ -274,6 +290,21 @@ class CLI:
             logger.exception("Unexpected error in interactive session")
             self.ui.error(UI_MESSAGES["errors"]["unexpected_error"])
 
+    def _warm_up_embedder(self, db_client):
+        """
+        Load the embedding model and the indexes of the indexed collections in the
+        background so the first RAG query doesn't pay for them.
+        """
+        def warm_up():
+            try:
+                self.embedder.warm_up()
+            except Exception as e:
+                logger.warning(f"Failed to warm up the embedding model: {e}")
+
+            db_client.warm_up_collections()
+
+        threading.Thread(target=warm_up, daemon=True).start()
+
     def _integrate_rag(self, agent: BaseAgent, available: bool):
         """Integrate Retrieval-Augmented Generation (RAG) into the agent."""
         if not available:
@@ -287,9 +318,8 @@ class CLI:
             return
 
         agent.register_command("/embed", lambda *args: handle_embed_request(*args))
-        # If extra arguments are passed by the user, they will be ignored
-        # This is to ensure a frictionless experience for the user as the command is pretty straightforward
-        agent.register_command("/start_rag", lambda *args: self._enable_rag(agent))
+        # flags may come in any order, unknown arguments are reported and ignored
+        agent.register_command("/start_rag", lambda *args: self._enable_rag(agent, *args))
         agent.register_command("/stop_rag", lambda *args: self._disable_rag(agent))
 
         agent.register_command("/index", lambda *args: handle_index_request(*args))
@@ -297,20 +327,69 @@ class CLI:
 
         # DB management commands
         agent.register_command("/list", lambda *args: handle_list_command())
+        agent.register_command("/stats", lambda *args: handle_stats_command(*args))
+        agent.register_command("/export", lambda *args: handle_export_command(*args))
+        agent.register_command("/import", lambda *args: handle_import_command(*args))
+        agent.register_command("/compact", lambda *args: handle_compact_command(*args))
         agent.register_command("/purge", lambda *args: handle_purge_command())
         agent.register_command(
             "/delete", lambda *args: handle_delete_command(*args)
         )  # followed by <collection_name>
 
-    def _enable_rag(self, agent: BaseAgent):
-        """Enable RAG functionality."""
+    def _enable_rag(self, agent: BaseAgent, *args):
+        """
+        Enable RAG functionality, optionally compressing retrieved passages (`--compress`),
+        recalling older turns of the conversation (`--memory`) and limited with
+        `--where key=value ...` filters.
+        """
         if not self.rag_available:
             self.ui.warning(UI_MESSAGES["warnings"]["rag_not_available"])
             return
-        agent._toggle_rag(enable=True)
+
+        compress = memory = where = False
+        filter_args, ignored = [], []
+        for arg in args:
+            flag = arg.lower()
+            if flag == "--compress":
+                compress = True
+            elif flag == "--memory":
+                memory = True
+            elif flag == "--where":
+                where = True
+            elif where and not arg.startswith("--"):
+                filter_args.append(arg)
+            else:
+                ignored.append(arg)
+
+        if ignored:
+            self.ui.warning(
+                UI_MESSAGES["warnings"]["ignored_arguments"].format(" ".join(ignored))
+            )
+
+        filters = None
+        if where:
+            if not filter_args:
+                self.ui.error(UI_MESSAGES["usage"]["start_rag"])
+                return
+            try:
+                filters = parse_filters(filter_args)
+            except ValueError as e:
+                self.ui.error(UI_MESSAGES["errors"]["invalid_filter"].format(e))
+                return
+
+        agent._toggle_rag(enable=True, filters=filters, compress=compress, memory=memory)
+        message = (
+            UI_MESSAGES["messages"]["rag_enabled_filtered"].format(" ".join(filter_args))
+            if filters
+            else UI_MESSAGES["messages"]["rag_enabled"]
+        )
+        if compress:
+            message += " " + UI_MESSAGES["messages"]["rag_compression"]
+        if memory:
+            message += " " + UI_MESSAGES["messages"]["rag_memory"]
         self.ui.status_message(
             title=UI_MESSAGES["titles"]["rag_enabled"],
-            message=UI_MESSAGES["messages"]["rag_enabled"],
+            message=message,
             style="success",
         )
 
@@ -451,6 +530,12 @@ class CLI:
             )
             self.model_names[agent_type] = new_model
 
+    def _apply_context_window(self, *agents: BaseAgent):
+        """Give the agents the configured model context size, which sizes their RAG context."""
+        if self.context_window:
+            for agent in agents:
+                agent.context_window = self.context_window
+
     def _run_codegen_unit(self, working_dir: str, initial_prompt: str = None) -> bool:
         """Execute the coding workflow with proper error handling."""
 
@@ -463,6 +548,8 @@ class CLI:
                 providers=self.providers,
             )
 
+            self._apply_context_window(*agents.values())
+
             codegen_unit = CodeGenUnit(
                 code_gen_agent=agents["code_gen"],
                 web_searcher_agent=agents["web_searcher"],
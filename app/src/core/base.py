@@ -1,15 +1,26 @@
 from app.utils.ascii_art import ASCII_ART
-from app.utils.constants import RECURSION_LIMIT, PROMPTS
+from app.utils.constants import (
+    RECURSION_LIMIT,
+    PROMPTS,
+    DEFAULT_CONTEXT_WINDOW,
+    RAG_CONTEXT_SHARE,
+    RAG_CANDIDATES,
+    LAST_N_TURNS,
+    MEMORY_RECALL_TURNS,
+)
 from app.src.core.exception_handler import AgentExceptionHandler
 from app.src.core.permissions import PermissionDeniedException
 from app.src.embeddings.rag_errors import SetupFailedError, DBAccessError
 from app.utils.logger import logger
 from langchain_core.messages import AIMessage, ToolMessage, BaseMessage, HumanMessage
 from app.src.embeddings.db_client import DataBaseClient
+from app.src.embeddings.query_builder import build_retrieval_query
+from app.src.embeddings.context_packer import approximate_tokens, pack_context
 from langgraph.graph.state import CompiledStateGraph
 from typing import Callable
 from langgraph.graph import StateGraph
 from app.src.core.ui import AgentUI
+from app.src.core.create_base_agent import flatten_content
 import langgraph.errors as lg_errors
 from app.utils.ui_messages import UI_MESSAGES
 import subprocess
@@ -53,16 +64,86 @@ class BaseAgent:
 
         # a flag to determine if RAG features should be integrated
         self.rag = False
-
-        self.latest_refs: set[str] = set()
+        # retrieval filters set by `/start_rag --where ...` (see `filters.parse_filters`)
+        self.rag_filters: dict | None = None
+        # `/start_rag --compress`: keep only the sentences of retrieved passages closest to the query
+        self.rag_compress = False
+        # `/start_rag --memory`: embed every turn and recall the older ones relevant to new messages
+        self.rag_memory = False
+        # the user's previous message, to give short follow-up queries their context
+        self.previous_input: str | None = None
+
+        # model context size in tokens, RAG context gets a share of it every turn
+        self.context_window = DEFAULT_CONTEXT_WINDOW
+
+        self.latest_refs: list[str] = []
         self.db_client = None
 
         # backup model name after failed `/model change` command
         self.prev_model_name = None
 
-    def _toggle_rag(self, enable: bool = True):
-        """Enable or disable RAG features."""
+    def _toggle_rag(
+        self,
+        enable: bool = True,
+        filters: dict = None,
+        compress: bool = False,
+        memory: bool = False,
+    ):
+        """Enable or disable RAG features, optionally limited by retrieval filters."""
         self.rag = enable
+        self.rag_filters = filters if enable else None
+        self.rag_compress = compress and enable
+        self.rag_memory = memory and enable
+
+    def _recall_memory(self, query: str) -> HumanMessage | None:
+        """
+        Past turns of the conversation relevant to the new message that already fell
+        out of the recent window, as a message dropped again after this turn (like RAG context).
+        """
+        if not self.rag_memory:
+            return None
+
+        db_client = DataBaseClient.get_instance()
+        if db_client is None:
+            return None
+
+        try:
+            turns = db_client.recall_turns(
+                self.get_session_id(), query, MEMORY_RECALL_TURNS, LAST_N_TURNS
+            )
+        except DBAccessError:
+            logger.warning("Failed to recall past turns of the conversation")
+            return None
+
+        if not turns:
+            return None
+        return HumanMessage(
+            content=PROMPTS["memory"] + "\n\n".join(turns),
+            additional_kwargs={"RAG": True},
+        )
+
+    def _remember_turn(self, user_message: str, last_chunk: dict | None) -> None:
+        """Embed a completed turn into the conversation's memory."""
+        if not self.rag_memory or not isinstance(last_chunk, dict):
+            return
+
+        db_client = DataBaseClient.get_instance()
+        if db_client is None:
+            return
+
+        answer = ""
+        for update in last_chunk.values():
+            messages = update.get("messages", []) if isinstance(update, dict) else []
+            for message in messages:
+                if isinstance(message, AIMessage):
+                    answer = self._remove_thinking_block(flatten_content(message.content))
+        if not answer.strip():
+            return
+
+        try:
+            db_client.remember_turn(self.get_session_id(), user_message, answer)
+        except DBAccessError:
+            logger.warning("Failed to remember the last turn of the conversation")
 
     def get_session_id(self) -> str:
         """Get the current session/thread ID."""
@@ -127,12 +208,18 @@ class BaseAgent:
                     self._handle_shell_command(user_input[1:].strip())
                     continue
 
+                # retrieval works on what the user typed, not on the suffixes added below
+                retrieval_query = build_retrieval_query(user_input, self.previous_input)
+                self.previous_input = user_input
+                raw_input = user_input
+
                 if first_msg and initial_prompt_suffix:
                     user_input += f"\n\n{initial_prompt_suffix}"
                 if recurring_prompt_suffix:
                     user_input += f"\n\n{recurring_prompt_suffix}"
 
                 rag_final_message = None
+                memory_message = None
                 query_results = None
                 extra_rag_context = ""
 
@@ -147,22 +234,27 @@ class BaseAgent:
                             )
                         else:
                             query_results = self.db_client.get_query_results(
-                                user_input, n_results=5
+                                retrieval_query,
+                                n_results=RAG_CANDIDATES,
+                                filters=self.rag_filters,
                             )
-                            if query_results:
-                                extra_rag_context += PROMPTS["rag_results"]
-                                extra_rag_context += "\n".join(
-                                    [f"- {doc}" for doc, _ in query_results]
+                            if query_results and self.rag_compress:
+                                query_results = self.db_client.compress_query_results(
+                                    retrieval_query, query_results
                                 )
 
+                    self.latest_refs = []
                     if query_results:
-                        self.latest_refs = {
-                            meta["file_path"]
-                            for _, meta in query_results
-                            if meta and "file_path" in meta
-                        }
-                    else:
-                        self.latest_refs = set()
+                        # best passages first, cut to the turn's token budget; a chunk may
+                        # come from a document stored under several paths
+                        packed, self.latest_refs = pack_context(
+                            query_results,
+                            budget=int(self.context_window * RAG_CONTEXT_SHARE),
+                            count_tokens=approximate_tokens,
+                            get_paths=self.db_client.get_document_paths,
+                        )
+                        if packed:
+                            extra_rag_context = PROMPTS["rag_results"] + packed
 
                     if extra_rag_context:
                         rag_final_message = HumanMessage(
@@ -172,14 +264,15 @@ class BaseAgent:
                             },
                         )
 
+                    memory_message = self._recall_memory(retrieval_query)
+
                 last = None
                 for chunk in self.agent.stream(
                     {
-                        "messages": (
-                            [("human", user_input), rag_final_message]
-                            if rag_final_message
-                            else [("human", user_input)]
-                        )
+                        "messages": [
+                            ("human", user_input),
+                            *(m for m in (rag_final_message, memory_message) if m),
+                        ]
                     },
                     config=self.configuration,
                 ):
@@ -189,6 +282,8 @@ class BaseAgent:
                 if not stream:
                     self._display_chunk(last)
 
+                self._remember_turn(raw_input, last)
+
             except KeyboardInterrupt:
                 self.ui.goodbye()
                 return True
@@ -332,6 +427,7 @@ class BaseAgent:
 
         if user_input.strip().lower() == "/clear":
             configuration["configurable"]["thread_id"] = str(uuid.uuid4())
+            self.previous_input = None
             self.ui.history_cleared()
             return True
 
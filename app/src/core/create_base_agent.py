@@ -310,6 +310,7 @@ def clean_context_window(messages: list[BaseMessage]):
     """
     Clean the context window by keeping only the last N turns.
     And truncating the tools arguments for brevity.
+    Relevant older turns are recalled from the conversation's memory instead (see `BaseAgent._recall_memory`).
     """
     new_context = []
     turn_count = 0
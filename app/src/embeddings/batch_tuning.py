@@ -0,0 +1,95 @@
+from app.src.embeddings.embedding_functions.abstract_embedder import EmbeddingProvider
+from app.utils.constants import CALIBRATION_BATCH_SIZES
+from app.utils.logger import logger
+from typing import Callable
+from pathlib import Path
+from datetime import datetime
+import json
+import time
+
+
+class BatchSizeTuner:
+    """
+    Measure embedding throughput across batch sizes and remember the best one
+    per (provider, model, host) in a small JSON cache file.
+    """
+
+    def __init__(self, cache_path: Path) -> None:
+        self.cache_path = cache_path
+        self._cache: dict[str, dict] = self._load()
+
+    @staticmethod
+    def cache_key(embedder: EmbeddingProvider) -> str:
+        return f"{embedder.name}|{embedder.model_name}|{embedder.host}"
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            with open(self.cache_path, "r") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return {}
+
+    def _save(self) -> None:
+        try:
+            with open(self.cache_path, "w") as f:
+                json.dump(self._cache, f, indent=2)
+        except Exception as e:
+            logger.error("Failed to save calibrated batch sizes", exc_info=e)
+
+    def get(self, embedder: EmbeddingProvider) -> dict | None:
+        """
+        Return the calibrated settings for this embedder, if any.
+
+        **format**: {"batch_size": int, "chunks_per_sec": float, "calibrated_at": str}
+        """
+        return self._cache.get(self.cache_key(embedder))
+
+    def calibrate(
+        self,
+        embedder: EmbeddingProvider,
+        embed_batch: Callable[[list[str]], list[list[float]]],
+        sample: list[str],
+        batch_sizes: list[int] = CALIBRATION_BATCH_SIZES,
+    ) -> tuple[int, float]:
+        """
+        Time `embed_batch` on the sample for each candidate batch size.
+
+        Args:
+            embedder (EmbeddingProvider): The embedder being measured (used for the cache key and limits).
+            embed_batch (Callable): Function embedding one batch, including any rate limiting.
+            sample (list[str]): Real chunks to embed.
+            batch_sizes (list[int]): Candidate batch sizes.
+
+        Returns:
+            tuple[int, float]: The best batch size and its throughput in chunks per second.
+        """
+        candidates = [
+            size for size in batch_sizes if size <= embedder.max_batch_items
+        ] or [embedder.max_batch_items]
+
+        # the first call may load the model, keep it out of the measurements
+        embed_batch(sample[: candidates[0]])
+
+        best_size, best_rate = candidates[0], 0.0
+        for size in candidates:
+            batches = [sample[i : i + size] for i in range(0, len(sample), size)]
+
+            started = time.perf_counter()
+            for batch in batches:
+                embed_batch(batch)
+            elapsed = time.perf_counter() - started
+
+            rate = len(sample) / elapsed if elapsed > 0 else float("inf")
+            logger.info(f"Calibration {self.cache_key(embedder)}: batch size {size} -> {rate:.1f} chunks/s")
+
+            if rate > best_rate:
+                best_size, best_rate = size, rate
+
+        self._cache[self.cache_key(embedder)] = {
+            "batch_size": best_size,
+            "chunks_per_sec": round(best_rate, 2),
+            "calibrated_at": datetime.now().isoformat(),
+        }
+        self._save()
+
+        return best_size, best_rate
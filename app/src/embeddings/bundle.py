@@ -0,0 +1,80 @@
+from pathlib import Path
+import zipfile
+import json
+import zlib
+
+
+# bumped whenever the layout below changes in an incompatible way
+BUNDLE_FORMAT_VERSION = 1
+
+
+def _encode_json(data) -> "np.ndarray":
+    import numpy as np
+
+    return np.frombuffer(json.dumps(data).encode("utf-8"), dtype=np.uint8)
+
+
+def _decode_json(array: "np.ndarray"):
+    return json.loads(array.tobytes().decode("utf-8"))
+
+
+def write_bundle(
+    file_path: str | Path,
+    embeddings: list[list[float]],
+    records: dict,
+    manifest: dict,
+) -> None:
+    """
+    Write a collection bundle: a compressed NumPy `.npz` archive with
+
+    - `embeddings`: float16 matrix, one row per chunk
+    - `records`: UTF-8 JSON with the chunk `ids`, `documents` and `metadatas`
+    - `manifest`: UTF-8 JSON with the format version, embedding model and ingestion manifest rows
+
+    Strings are stored as JSON bytes rather than object arrays so loading never needs pickle.
+    """
+    import numpy as np
+
+    np.savez_compressed(
+        file_path,
+        embeddings=np.asarray(embeddings, dtype=np.float16),
+        records=_encode_json(records),
+        manifest=_encode_json({"format_version": BUNDLE_FORMAT_VERSION, **manifest}),
+    )
+
+
+def read_bundle(file_path: str | Path) -> tuple["np.ndarray", dict, dict]:
+    """
+    Read a bundle written by `write_bundle`.
+
+    Returns:
+        tuple: The float16 embeddings, the records and the manifest.
+
+    Raises:
+        ValueError: If the file isn't a bundle (or a damaged one), or uses a newer format.
+    """
+    import numpy as np
+
+    try:
+        with np.load(file_path, allow_pickle=False) as bundle:
+            if not {"embeddings", "records", "manifest"} <= set(bundle.files):
+                raise ValueError("Not a collection bundle")
+
+            manifest = _decode_json(bundle["manifest"])
+            records = _decode_json(bundle["records"])
+            embeddings = bundle["embeddings"]
+
+    # truncated archives, non-npz files and arrays of the wrong kind
+    except (zipfile.BadZipFile, zlib.error, EOFError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Not a collection bundle: {e!r}")
+
+    if not isinstance(manifest, dict) or not isinstance(records, dict):
+        raise ValueError("Not a collection bundle")
+    if not {"ids", "documents", "metadatas"} <= records.keys():
+        raise ValueError("Not a collection bundle: records are incomplete")
+    if manifest.get("format_version", 0) > BUNDLE_FORMAT_VERSION:
+        raise ValueError(
+            f"Bundle format {manifest.get('format_version')} is newer than supported ({BUNDLE_FORMAT_VERSION})"
+        )
+
+    return embeddings, records, manifest
@@ -0,0 +1,79 @@
+from app.src.embeddings.context_packer import split_sentences
+from typing import Any, Callable
+
+
+def compress_passages(
+    query: str,
+    passages: list[str],
+    embed: Callable[[list[str]], list[list[float]]],
+    keep: int,
+    neighbours: int = 1,
+) -> list[str]:
+    """
+    Extractive compression: keep the sentences of each passage closest to the query.
+
+    The query and every sentence of every passage are embedded in one call, each
+    sentence is scored by cosine similarity to the query, and each passage is cut
+    down to its `keep` best sentences plus `neighbours` sentences on each side of
+    them, in their original order. Dropped runs are marked with "...".
+
+    Args:
+        query (str): The retrieval query.
+        passages (list[str]): The retrieved passages.
+        embed (Callable): The embedding function of the knowledge base.
+        keep (int): Best sentences kept per passage.
+        neighbours (int): Sentences kept around each of them.
+
+    Returns:
+        list[str]: The compressed passages, in the same order. Passages too short to
+            gain anything are returned unchanged.
+    """
+    import numpy as np
+
+    split = [split_sentences(passage) for passage in passages]
+    # passages that would keep every sentence anyway aren't embedded at all
+    window = keep * (2 * neighbours + 1)
+    targets = [i for i, sentences in enumerate(split) if len(sentences) > window]
+    if not targets:
+        return passages
+
+    sentences = [sentence for i in targets for sentence in split[i]]
+    vectors = np.asarray(embed([query, *sentences]), dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    scores = vectors[1:] @ vectors[0]
+
+    compressed = list(passages)
+    offset = 0
+    for i in targets:
+        count = len(split[i])
+        passage_scores = scores[offset : offset + count]
+        offset += count
+
+        kept = np.zeros(count, dtype=bool)
+        for best in np.argsort(-passage_scores)[:keep]:
+            kept[max(0, best - neighbours) : best + neighbours + 1] = True
+
+        parts, gap = [], False
+        for sentence, is_kept in zip(split[i], kept):
+            if is_kept:
+                if gap and parts:
+                    parts.append("...")
+                parts.append(sentence)
+                gap = False
+            else:
+                gap = True
+        compressed[i] = " ".join(parts)
+
+    return compressed
+
+
+def compress_results(
+    query: str,
+    results: list[tuple[str, dict[str, Any]]],
+    embed: Callable[[list[str]], list[list[float]]],
+    keep: int,
+    neighbours: int = 1,
+) -> list[tuple[str, dict[str, Any]]]:
+    """`compress_passages` over (passage, metadata) retrieval results."""
+    passages = compress_passages(query, [doc for doc, _ in results], embed, keep, neighbours)
+    return [(passage, meta) for passage, (_, meta) in zip(passages, results)]
@@ -0,0 +1,122 @@
+from typing import Any, Callable
+import os
+import math
+import re
+
+from app.utils.constants import CHARS_PER_TOKEN
+
+
+# sentence ends followed by whitespace, or blank lines (paragraphs, list blocks)
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+
+def split_sentences(text: str) -> list[str]:
+    """Split a passage into sentences, with their whitespace collapsed."""
+    return [
+        " ".join(sentence.split())
+        for sentence in _SENTENCE_BOUNDARY.split(text)
+        if sentence.strip()
+    ]
+
+
+def approximate_tokens(text: str) -> int:
+    """
+    Approximate count of chat model tokens in `text`, from its length.
+    The chat model's tokenizer isn't available locally, so this is only an estimate.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _fitting_prefix(
+    parts: list, separator: str, budget: int, count_tokens: Callable[[str], int]
+) -> int:
+    """Binary search for the most leading `parts` that fit in `budget` tokens once joined."""
+    low, high = 0, len(parts)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(separator.join(parts[:middle])) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _trim(text: str, budget: int, count_tokens: Callable[[str], int]) -> str:
+    """
+    The longest run of leading sentences of `text` that fits in `budget` tokens.
+    If not even the first sentence fits, it is cut between words instead (or between
+    characters, for text without spaces).
+    """
+    sentences = split_sentences(text)
+    kept = _fitting_prefix(sentences, " ", budget, count_tokens)
+    if kept or not sentences:
+        return " ".join(sentences[:kept])
+
+    words = sentences[0].split(" ")
+    kept = _fitting_prefix(words, " ", budget, count_tokens)
+    if kept:
+        return " ".join(words[:kept])
+
+    return words[0][: _fitting_prefix(list(words[0]), "", budget, count_tokens)]
+
+
+def pack_context(
+    results: list[tuple[str, dict[str, Any]]],
+    budget: int,
+    count_tokens: Callable[[str], int],
+    get_paths: Callable[[dict[str, Any]], list[str]],
+) -> tuple[str, list[str]]:
+    """
+    Pack retrieved passages into a block of at most `budget` tokens.
+
+    Passages are taken greedily in the order given (best score first). A passage that
+    doesn't fit whole is cut at a sentence boundary (or within its first sentence,
+    if even that doesn't fit). Each passage is tagged with a short `[n]` source number, and the
+    block ends with a legend mapping the numbers to file names.
+
+    Args:
+        results (list): (passage, metadata) pairs, best first.
+        budget (int): Maximum size of the block in tokens, legend included.
+        count_tokens (Callable): Token counter used for the budget.
+        get_paths (Callable): The paths holding a passage, from its metadata.
+
+    Returns:
+        tuple: The packed block ("" if nothing fits) and the references of the packed
+            sources as `[n] path` lines, for `/refs`.
+    """
+    lines: list[str] = []
+    # first path of each packed source -> (tag, every path holding it)
+    sources: dict[str, tuple[int, list[str]]] = {}
+    used = count_tokens("Sources: ")
+
+    for passage, metadata in results:
+        paths = get_paths(metadata) if metadata else []
+        key = paths[0] if paths else ""
+        tag = sources[key][0] if key in sources else len(sources) + 1
+        label = f"[{tag}] {os.path.basename(key) or '?'}"
+
+        # a new source also costs its legend entry
+        overhead = count_tokens(f"[{tag}] ") + (0 if key in sources else count_tokens(label))
+        remaining = budget - used - overhead
+        if remaining <= 0:
+            continue
+
+        text = " ".join(passage.split())
+        if count_tokens(text) > remaining:
+            text = _trim(passage, remaining, count_tokens)
+            if not text:
+                continue
+
+        sources.setdefault(key, (tag, paths))
+        lines.append(f"[{tag}] {text}")
+        used += overhead + count_tokens(text)
+
+    if not lines:
+        return "", []
+
+    legend = ", ".join(
+        f"[{tag}] {os.path.basename(key) or '?'}" for key, (tag, _) in sources.items()
+    )
+    refs = [f"[{tag}] {path}" for tag, paths in sources.values() for path in paths]
+
+    return "\n".join(lines) + f"\nSources: {legend}", refs
@@ -1,19 +1,88 @@
-from app.utils.constants import CHUNK_SIZE, CHUNK_OVERLAP, DEFAULT_PATHS, MAX_RESULTS, BATCH_SIZE
+from app.utils.constants import (
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    DEFAULT_PATHS,
+    MAX_RESULTS,
+    BATCH_SIZE,
+    CALIBRATION_SAMPLE_SIZE,
+    LATENCY_SAMPLES,
+    RESCORE_CANDIDATES,
+    INT8_CALIBRATION_VECTORS,
+    ROUTING_CENTROIDS,
+    ROUTING_MARGIN,
+    QUERY_CACHE_SIZE,
+    QUERY_CACHE_DISK_SIZE,
+    RAG_COMPRESSION_SENTENCES,
+    RAG_COMPRESSION_NEIGHBOURS,
+    PARENT_MAX_CHARS,
+    PARENT_MIN_CHARS,
+    MEMORY_TURN_CHARS,
+    MEMORY_MAX_TURNS,
+    MEMORY_RETENTION_DAYS,
+    MINHASH_PERMUTATIONS,
+    MINHASH_BANDS,
+    MINHASH_THRESHOLD,
+    COMPACT_PROBE_QUERIES,
+)
+from app.src.embeddings.batch_tuning import BatchSizeTuner
+from app.src.embeddings.manifest import IngestionManifest
+from app.src.embeddings.bundle import read_bundle, write_bundle
+from app.src.embeddings.routing import route, update_centroids
+from app.src.embeddings.filters import match_path
+from app.src.embeddings.query_cache import QueryCache
+from app.src.embeddings.compression import compress_results
+from app.src.embeddings.sections import section_of, split_sections
+from app.src.embeddings import minhash
+from app.src.embeddings.vector_storage import (
+    VectorStore,
+    calibrate_int8,
+    decode,
+    encode,
+    stored_precision,
+    truncate,
+)
 from app.src.embeddings.scrapers.abstract_scraper import Scraper
+from app.src.embeddings.scrapers.archives import (
+    ARCHIVE_SEPARATOR,
+    ArchiveMember,
+    is_archive,
+    iter_archive_members,
+    member_path,
+)
+from app.src.tools.git_tools import get_changed_files, get_head_commit, list_files
+from app.src.embeddings.embedding_functions.abstract_embedder import EmbeddingProvider
 from app.src.helpers.valid_dir import validate_dir_name
 from app.src.embeddings.rag_errors import DBAccessError, ScrapingFailedError
 from app.src.core.ui import default_ui
 from app.utils.logger import logger
 from app.utils.ui_messages import UI_MESSAGES
-from typing import Callable, Any
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
 from pathlib import Path
 from datetime import datetime
+from collections import Counter
+import threading
 import json
+import io
 import os
 import time
 from requests.exceptions import HTTPError
 
 
+# HNSW parameters settable per collection, and their collection metadata keys
+INDEX_PARAMS = {
+    "space": "hnsw:space",
+    "m": "hnsw:M",
+    "ef_construction": "hnsw:construction_ef",
+    "ef_search": "hnsw:search_ef",
+}
+INDEX_SPACES = ("l2", "cosine", "ip")
+
+# name prefix of the collections holding the past turns of each conversation; they are
+# recorded in the manifest and hidden from the user
+MEMORY_COLLECTION_PREFIX = "ally-memory-"
+
 # configure database path
 DB_PATH = ""
 if "ALLY_DATABASE_DIR" in os.environ:
@@ -39,7 +108,7 @@ class DataBaseClient:
         return cls._instance
 
     def __init__(
-        self, embedding_function: Callable = None, scraper: Scraper = None
+        self, embedder: EmbeddingProvider = None, scraper: Scraper = None
     ) -> None:
         try:
             import chromadb
@@ -54,7 +123,23 @@ class DataBaseClient:
         self.db_client = chromadb.PersistentClient(
             path=DB_PATH, settings=Settings(anonymized_telemetry=False)
         )
-        self.embedding_function = embedding_function
+        self.embedder = embedder
+        self.embedding_function = embedder.get_embeddings
+
+        # batch sizes measured by `/embed --calibrate`, per (provider, model, host)
+        self.batch_tuner = BatchSizeTuner(DB_PATH / "batch_sizes.json")
+        tuned = self.batch_tuner.get(embedder)
+        if tuned:
+            self._apply_batch_size(tuned["batch_size"])
+
+        # requests to the embedder are spaced by its declared minimum interval
+        self._rate_lock = threading.Lock()
+        self._last_request_time = 0.0
+        # bulk ingestion stores several documents at once: guards the collection-wide
+        # read-modify-write state (indexed collections, routing summaries, int8 scales)
+        self._write_lock = threading.RLock()
+        # held while a collection is written to, compaction waits for (and blocks) writers
+        self._collection_locks: dict[str, threading.RLock] = {}
 
         self.scraper = scraper
 
@@ -66,6 +151,23 @@ class DataBaseClient:
 
         self.indexed_collections: dict[str, bool] = self._load_indexed_collections()
 
+        # what was ingested into each collection, used for change detection and estimates
+        self.manifest = IngestionManifest(DB_PATH / "manifest.sqlite")
+        # compact full-dimension vectors of collections that rescore their candidates
+        self.vector_store = VectorStore(DB_PATH / "vectors.sqlite")
+        # final retrieval results, keyed by query and collection generations
+        self.query_cache = QueryCache(
+            QUERY_CACHE_SIZE, DB_PATH / "query_cache.sqlite", QUERY_CACHE_DISK_SIZE
+        )
+        # `/start_rag --where path=...` clauses, by collection and patterns, with the
+        # collection generation they were resolved at
+        self._path_clauses: dict[tuple, tuple[int, dict | None]] = {}
+
+        try:
+            self._recover_compactions()
+        except DBAccessError:
+            logger.warning("Failed to recover interrupted compactions")
+
     @staticmethod
     def get_instance() -> "DataBaseClient":
         """Get the singleton instance of DataBaseClient."""
@@ -103,79 +205,760 @@ class DataBaseClient:
             logger.error(f"Failed to save indexed collections", exc_info=e)
             default_ui.error(UI_MESSAGES["errors"]["failed_save_indexed"])
 
+    @contextmanager
+    def _collection_lock(self, collection_name: str):
+        """Hold a collection's write lock (see `compact_collection`)."""
+        with self._write_lock:
+            lock = self._collection_locks.setdefault(collection_name, threading.RLock())
+        with lock:
+            yield
+
     def index_collection(self, collection_name: str) -> None:
         """Mark a collection as indexed."""
-        self.indexed_collections[collection_name] = True
-        self._save_indexed_collections()
+        with self._collection_lock(collection_name):
+            self.indexed_collections[collection_name] = True
+            self._save_indexed_collections()
 
     def unindex_collection(self, collection_name: str) -> None:
         """Mark a collection as unindexed."""
-        if collection_name in self.indexed_collections:
-            self.indexed_collections[collection_name] = False
-            self._save_indexed_collections()
+        with self._collection_lock(collection_name):
+            if collection_name in self.indexed_collections:
+                self.indexed_collections[collection_name] = False
+                self._save_indexed_collections()
 
-    def already_stored(self, file_path: str, collection_name: str) -> bool:
-        """Check if a document is already stored in the database."""
-        import chromadb.errors as chromadb_errors
+    def store_document(self, file_path: str, collection_name: str) -> None:
+        """
+        Store document content and metadata in ChromaDB.
+
+        Documents are content-addressed: a file whose content is already stored in
+        the collection is only linked to it, and one already embedded with the same
+        model in another collection is copied over instead of being re-embedded.
+
+        Chunks are committed batch by batch and the progress is checkpointed in the
+        manifest, so an interrupted run resumes from the last committed batch.
+        """
+        stat = Path(file_path).stat()
+        self._store(
+            collection_name,
+            file_path,
+            self.scraper.get_hash(file_path),
+            stat.st_size,
+            stat.st_mtime,
+            scrape=lambda: self.scraper.scrape(file_path),
+        )
+
+    def store_archive_member(self, member: ArchiveMember, collection_name: str) -> None:
+        """Store a file read from an archive, under its `archive!member` path."""
+        data = member.read()
+        self._store(
+            collection_name,
+            member.path,
+            self.scraper.get_bytes_hash(data),
+            member.size,
+            member.mtime,
+            scrape=lambda: self.scraper.scrape_stream(
+                io.BytesIO(data), member.path, member.mtime
+            ),
+        )
+
+    def _store(
+        self,
+        collection_name: str,
+        file_path: str,
+        file_hash: str,
+        size: int,
+        mtime: float,
+        scrape: Callable[[], dict],
+    ) -> None:
+        """Link, copy or embed a document, then record it in the manifest."""
+        with self._write_lock:
+            if collection_name not in self.indexed_collections:
+                self.indexed_collections[collection_name] = True  # default to indexed
+                self._save_indexed_collections()
+
+        collection = self.db_client.get_or_create_collection(
+            name=collection_name,
+        )
+
+        # the path used to hold other content: release it first
+        previous = self.manifest.get_file(collection_name, file_path)
+        if previous is not None and previous["hash"] != file_hash:
+            self._unlink_path(collection, file_path)
+
+        file_metadata = self._file_metadata(file_path, size, mtime)
+
+        stored = self.manifest.get_document(collection_name, file_hash)
+        if stored is None:
+            stored = self._copy_document(collection, file_hash, file_metadata)
+        if stored is None:
+            stored = self._embed_document(
+                collection, file_path, file_hash, scrape, file_metadata
+            )
+
+        self.manifest.record_file(
+            collection_name,
+            file_path,
+            file_hash,
+            size=size,
+            mtime=mtime,
+            chunks=stored["chunks"],
+            chars=stored["chars"],
+        )
+
+    @staticmethod
+    def _file_metadata(file_path: str, size: int, mtime: float) -> dict[str, Any]:
+        """Chunk metadata describing the file a document was stored from, used by retrieval filters."""
+        path = Path(file_path).as_posix()
+        name = path.rsplit("/", 1)[-1]
+        return {
+            "file_path": path,
+            "directory": path.rsplit("/", 1)[0] if "/" in path else "",
+            "extension": name.rsplit(".", 1)[-1].lower() if "." in name else "",
+            "size": size,
+            "mod_ts": mtime,
+        }
+
+    def _embed_document(
+        self,
+        collection,
+        file_path: str,
+        file_hash: str,
+        scrape: Callable[[], dict],
+        file_metadata: dict[str, Any],
+    ) -> dict:
+        """Scrape, chunk and embed a document. Returns its chunk and character counts."""
+        checkpoint = self.manifest.get_checkpoint(collection.name, file_path)
+
+        response = scrape()
+        content = response["content"]
+        metadata = {**response["metadata"], **file_metadata}
+        # the hash the document is stored under, even if the file changed since
+        metadata["hash"] = file_hash
+
+        chunks = self._chunk(content)
+
+        # chunks are matched, the sections holding them are what queries return
+        section_starts = split_sections(content, PARENT_MAX_CHARS, PARENT_MIN_CHARS)
+        self.manifest.set_sections(
+            file_hash,
+            [
+                content[start:end]
+                for start, end in zip(section_starts, [*section_starts[1:], len(content)])
+            ],
+        )
+
+        done = 0
+        if checkpoint is not None:
+            if checkpoint["hash"] == file_hash:
+                done = checkpoint["chunks_done"]
+            else:
+                # the file changed since the interrupted run, drop its partial chunks
+                collection.delete(
+                    where={"$and": [{"hash": checkpoint["hash"]}, {"file_path": file_path}]}
+                )
+                self.vector_store.delete_document(collection.name, checkpoint["hash"])
+                if self.manifest.get_document(collection.name, checkpoint["hash"]) is None:
+                    self._restore_aliases(
+                        collection, self.manifest.remove_chunks(collection.name, checkpoint["hash"])
+                    )
+
+        chunk_metadata = [
+            {**metadata, "parent": section_of(section_starts, i * (CHUNK_SIZE - CHUNK_OVERLAP))}
+            for i in range(len(chunks))
+        ]
+        # near-duplicates of chunks already stored are recorded as aliases instead
+        pending, signatures = self._skip_near_duplicates(
+            collection.name, file_hash, chunks, chunk_metadata, done
+        )
+
+        dimensions = None
+        for batch_embeddings in self._embed_batches([chunks[i] for i in pending]):
+            dimensions = len(batch_embeddings[0])
+            indexes, pending = pending[: len(batch_embeddings)], pending[len(batch_embeddings) :]
+            ids = [f"{file_hash}_{i}" for i in indexes]
+            index_embeddings = self._store_vectors(collection.name, ids, batch_embeddings)
+            collection.upsert(
+                documents=[chunks[i] for i in indexes],
+                metadatas=[chunk_metadata[i] for i in indexes],
+                embeddings=index_embeddings,
+                ids=ids,
+            )
+            self.manifest.add_signatures(
+                collection.name,
+                ids,
+                [signatures[i].tobytes() for i in indexes],
+                [minhash.band_keys(signatures[i], MINHASH_BANDS) for i in indexes],
+            )
+            self._update_summary(collection.name, index_embeddings)
+            done = indexes[-1] + 1
+            self.manifest.save_checkpoint(
+                collection.name, file_path, file_hash, done, len(chunks)
+            )
+
+        if dimensions:
+            self.manifest.set_embedder(
+                collection.name,
+                self.embedder.name,
+                self.embedder.model_name,
+                dimensions,
+            )
+
+        return {"chunks": len(chunks), "chars": len(content)}
+
+    def _skip_near_duplicates(
+        self,
+        collection_name: str,
+        file_hash: str,
+        chunks: list[str],
+        chunk_metadata: list[dict],
+        start: int,
+    ) -> tuple[list[int], dict[int, "np.ndarray"]]:
+        """
+        Find the chunks of a document (from `start` on) that are near-duplicates
+        (MinHash similarity of at least `MINHASH_THRESHOLD`) of a chunk already stored
+        in the collection, or of an earlier chunk of the document, and record them as
+        aliases of it.
+
+        Returns:
+            tuple: The indexes of the chunks left to embed, and the signature of each.
+        """
+        import numpy as np
+
+        rows = minhash.signatures(chunks[start:], MINHASH_PERMUTATIONS)
+        signatures = {start + i: row for i, row in enumerate(rows)}
+
+        pending, aliases = [], []
+        local: dict[str, list[int]] = {}
+        for i, signature in signatures.items():
+            keys = minhash.band_keys(signature, MINHASH_BANDS)
+
+            canonical = next(
+                (
+                    f"{file_hash}_{j}"
+                    for j in dict.fromkeys(j for key in keys for j in local.get(key, []))
+                    if minhash.similarity(signature, signatures[j]) >= MINHASH_THRESHOLD
+                ),
+                None,
+            )
+            if canonical is None:
+                canonical = next(
+                    (
+                        chunk_id
+                        for chunk_id, blob in self.manifest.minhash_candidates(collection_name, keys)
+                        if minhash.similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+                        >= MINHASH_THRESHOLD
+                    ),
+                    None,
+                )
+
+            if canonical is not None:
+                aliases.append((f"{file_hash}_{i}", canonical, chunks[i], chunk_metadata[i]))
+                continue
+
+            pending.append(i)
+            for key in keys:
+                local.setdefault(key, []).append(i)
+
+        if aliases:
+            self.manifest.add_aliases(collection_name, aliases)
+        return pending, signatures
+
+    def _restore_aliases(self, collection, aliases: list[dict]) -> None:
+        """Embed and store again the chunks that were aliases of deleted ones."""
+        if not aliases:
+            return
+
+        chunks = [alias["content"] for alias in aliases]
+        rows = minhash.signatures(chunks, MINHASH_PERMUTATIONS)
+        done = 0
+        for batch_embeddings in self._embed_batches(chunks):
+            batch = aliases[done : done + len(batch_embeddings)]
+            ids = [alias["chunk_id"] for alias in batch]
+            index_embeddings = self._store_vectors(collection.name, ids, batch_embeddings)
+            collection.upsert(
+                documents=[alias["content"] for alias in batch],
+                metadatas=[alias["metadata"] for alias in batch],
+                embeddings=index_embeddings,
+                ids=ids,
+            )
+            signatures = rows[done : done + len(batch)]
+            self.manifest.add_signatures(
+                collection.name,
+                ids,
+                [row.tobytes() for row in signatures],
+                [minhash.band_keys(row, MINHASH_BANDS) for row in signatures],
+            )
+            self._update_summary(collection.name, index_embeddings)
+            done += len(batch)
+
+    def _copy_document(
+        self, collection, file_hash: str, file_metadata: dict[str, Any]
+    ) -> dict | None:
+        """
+        Copy a document's chunks and embeddings from another collection built with
+        the same model. Returns its chunk and character counts, or None if there is none.
+        """
+        source_name = self.manifest.find_document(
+            file_hash, self.embedder.name, self.embedder.model_name
+        )
+        if source_name is None or source_name == collection.name:
+            return None
+
+        # the stored vectors are only interchangeable with the same storage settings
+        if not self._storage_compatible(source_name, collection.name):
+            return None
+
+        # some chunks of the document are only stored there as aliases of other documents
+        if self.manifest.has_aliases(source_name, file_hash):
+            return None
 
         try:
-            collection = self.db_client.get_collection(name=collection_name)
+            source = self.db_client.get_collection(name=source_name)
+            results = source.get(
+                where={"hash": file_hash},
+                include=["documents", "metadatas", "embeddings"],
+            )
+        except Exception as e:
+            logger.warning(f"Failed to copy {file_hash} from {source_name}: {e}")
+            return None
 
-        except chromadb_errors.NotFoundError:
+        if not results["ids"]:
+            return None
+
+        collection.upsert(
+            ids=results["ids"],
+            documents=results["documents"],
+            metadatas=[{**meta, **file_metadata} for meta in results["metadatas"]],
+            embeddings=results["embeddings"],
+        )
+        self.vector_store.copy_document(source_name, collection.name, file_hash)
+        signatures = minhash.signatures(results["documents"], MINHASH_PERMUTATIONS)
+        self.manifest.add_signatures(
+            collection.name,
+            results["ids"],
+            [row.tobytes() for row in signatures],
+            [minhash.band_keys(row, MINHASH_BANDS) for row in signatures],
+        )
+        self._update_summary(collection.name, results["embeddings"])
+        self.manifest.set_embedder(
+            collection.name,
+            self.embedder.name,
+            self.embedder.model_name,
+            len(results["embeddings"][0]),
+        )
+
+        return self.manifest.get_document(source_name, file_hash)
+
+    def _unlink_path(self, collection, file_path: str) -> None:
+        """Detach a path from its document, deleting the chunks once no path uses them."""
+        entry = self.manifest.get_file(collection.name, file_path)
+        if entry is None:
+            return
+
+        self.manifest.remove_file(collection.name, file_path)
+        remaining = self.manifest.paths_for_hash(entry["hash"], [collection.name])
+        if remaining:
+            self._retag_document(collection, entry["hash"], file_path, remaining[0])
+        else:
+            collection.delete(where={"hash": entry["hash"]})
+            self.vector_store.delete_document(collection.name, entry["hash"])
+            self.manifest.remove_document(collection.name, entry["hash"])
+            # chunks of other documents skipped as near-duplicates of these ones
+            self._restore_aliases(
+                collection, self.manifest.remove_chunks(collection.name, entry["hash"])
+            )
+
+    def _retag_document(
+        self, collection, file_hash: str, removed_path: str, file_path: str
+    ) -> None:
+        """Point the chunks of a document named after a removed path to one still holding it."""
+        results = collection.get(
+            where={"$and": [{"hash": file_hash}, {"file_path": Path(removed_path).as_posix()}]},
+            include=["metadatas"],
+        )
+        if not results["ids"]:
+            return
+
+        entry = self.manifest.get_file(collection.name, file_path)
+        file_metadata = self._file_metadata(file_path, entry["size"], entry["mtime"])
+        collection.update(
+            ids=results["ids"],
+            metadatas=[{**meta, **file_metadata} for meta in results["metadatas"]],
+        )
+
+    def configure_index(self, collection_name: str, index_params: dict | None) -> None:
+        """
+        Create a collection with the given HNSW parameters (see `INDEX_PARAMS`), stored
+        in its metadata. They can't change once the collection exists.
+        """
+        if not index_params:
+            return
+
+        metadata = {INDEX_PARAMS[name]: value for name, value in index_params.items()}
+
+        try:
+            if collection_name not in self.collection_names():
+                self.db_client.create_collection(name=collection_name, metadata=metadata)
+                return
+
+            current = self.db_client.get_collection(name=collection_name).metadata or {}
+        except Exception:
+            raise DBAccessError()
+
+        if any(current.get(key) != value for key, value in metadata.items()):
+            default_ui.warning(
+                UI_MESSAGES["warnings"]["index_locked"].format(collection_name)
+            )
+
+    def warm_up_collections(self) -> None:
+        """Load the vector index of every indexed collection by running a single query on it."""
+        for collection_name, indexed in list(self.indexed_collections.items()):
+            if not indexed:
+                continue
+
+            try:
+                collection = self.db_client.get_collection(name=collection_name)
+                sample = collection.get(limit=1, include=["embeddings"])
+                if len(sample["ids"]):
+                    collection.query(query_embeddings=sample["embeddings"], n_results=1)
+            except Exception as e:
+                logger.warning(f"Failed to warm up collection {collection_name}: {e}")
+
+    def _update_summary(self, collection_name: str, embeddings: list[list[float]]) -> None:
+        """Fold newly stored index vectors into the collection's routing centroids."""
+        import numpy as np
+
+        with self._write_lock:
+            summary = self.manifest.get_summary(collection_name)
+            centroids = counts = None
+            if summary is not None and summary["dims"] == len(embeddings[0]):
+                centroids = np.frombuffer(summary["centroids"], dtype=np.float32).reshape(-1, summary["dims"])
+                counts = np.asarray(summary["counts"], dtype=np.int64)
+
+            centroids, counts = update_centroids(centroids, counts, embeddings, ROUTING_CENTROIDS)
+            self.manifest.set_summary(
+                collection_name, centroids.tobytes(), counts.tolist(), centroids.shape[1]
+            )
+
+    def _route(self, collection_names: list[str], query_embedding: list[float]) -> list[str]:
+        """Keep the collections whose routing summary is close enough to the query."""
+        import numpy as np
+
+        query_vectors, summaries = {}, {}
+        for name in collection_names:
+            storage = self.manifest.get_storage(name) or {}
+            query_vectors[name] = truncate([query_embedding], storage.get("dims"))[0]
+
+            summary = self.manifest.get_summary(name)
+            # collections built with another model can't be compared, they are always searched
+            if summary is not None and summary["dims"] == len(query_vectors[name]):
+                summaries[name] = np.frombuffer(
+                    summary["centroids"], dtype=np.float32
+                ).reshape(-1, summary["dims"])
+
+        routed = route(query_vectors, summaries, ROUTING_MARGIN)
+        if len(routed) < len(collection_names):
+            logger.info(
+                f"Routing skipped collections: {sorted(set(collection_names) - set(routed))}"
+            )
+        return routed
+
+    def configure_storage(
+        self, collection_name: str, dims: int | None, rescore: str | None
+    ) -> None:
+        """
+        Set how a collection stores its vectors: truncated to `dims` components in the
+        index, and/or with a full-dimension copy in `rescore` precision to rescore the
+        top candidates. Only possible before anything is stored in the collection.
+        """
+        if dims is None and rescore is None:
+            return
+
+        current = self.manifest.get_storage(collection_name) or {}
+        if (current.get("dims"), current.get("rescore")) == (dims, rescore):
+            return
+
+        if self.manifest.collection_totals(collection_name)["chunks"]:
+            default_ui.warning(
+                UI_MESSAGES["warnings"]["storage_locked"].format(collection_name)
+            )
+            return
+
+        self.manifest.set_storage(collection_name, dims, rescore)
+
+    def _store_vectors(
+        self, collection_name: str, ids: list[str], embeddings: list[list[float]]
+    ) -> list[list[float]]:
+        """
+        Apply the collection's storage settings to a batch of embeddings: keep the
+        compact full-dimension copies, return what goes into the index.
+        """
+        with self._write_lock:
+            storage = self.manifest.get_storage(collection_name)
+            if storage is None:
+                return embeddings
+
+            if storage["rescore"]:
+                self.vector_store.put(
+                    collection_name,
+                    ids,
+                    encode(
+                        embeddings,
+                        stored_precision(storage["rescore"], storage["scales"]),
+                        storage["scales"],
+                    ),
+                )
+
+            if storage["rescore"] == "int8" and not storage["scales"]:
+                self._calibrate_int8(collection_name, storage)
+
+        return truncate(embeddings, storage["dims"])
+
+    def _calibrate_int8(self, collection_name: str, storage: dict) -> None:
+        """
+        Once enough float32 copies are stored, calibrate the collection's int8 scales
+        on all of them and re-encode them. Calibrated once, scales never change after.
+        """
+        if self.vector_store.count(collection_name) < INT8_CALIBRATION_VECTORS:
+            return
+
+        blobs = self.vector_store.items(collection_name)
+        vectors = decode(list(blobs.values()), "float32")
+        scales = calibrate_int8(vectors)
+        self.vector_store.put(collection_name, list(blobs), encode(vectors, "int8", scales))
+        self.manifest.set_storage(collection_name, storage["dims"], "int8", scales)
+        logger.info(f"Calibrated int8 storage of {collection_name} on {len(blobs)} vectors")
+
+    def _storage_compatible(self, source_name: str, target_name: str) -> bool:
+        """Whether vectors stored in one collection can be copied as-is into another."""
+        source = self.manifest.get_storage(source_name) or {}
+        target = self.manifest.get_storage(target_name) or {}
+
+        if source.get("dims") != target.get("dims"):
+            return False
+        if not target.get("rescore"):
+            return True
+        if source.get("rescore") != target.get("rescore"):
             return False
+        if target["rescore"] == "int8" and source.get("scales") != target.get("scales"):
+            # its copies are already encoded (calibrated, or float32 waiting for it)
+            if target.get("scales") or self.vector_store.count(target_name):
+                return False
+            # an empty int8 collection adopts the source's calibration
+            self.manifest.set_storage(
+                target_name, target["dims"], "int8", source.get("scales")
+            )
+        return True
+
+    def compress_query_results(
+        self, query: str, query_results: list[tuple[str, dict[str, Any]]]
+    ) -> list[tuple[str, dict[str, Any]]]:
+        """
+        Cut retrieved passages down to their sentences closest to the query (see
+        `compression.compress_passages`). Falls back to the passages as retrieved if
+        the embedder fails.
+        """
+
+        def embed(sentences: list[str]) -> list[list[float]]:
+            embeddings = []
+            for i in range(0, len(sentences), self.batch_size):
+                embeddings.extend(self.embedding_function(sentences[i : i + self.batch_size]))
+            return embeddings
+
+        try:
+            return compress_results(
+                query, query_results, embed, RAG_COMPRESSION_SENTENCES, RAG_COMPRESSION_NEIGHBOURS
+            )
+        except Exception as e:
+            logger.warning(f"Failed to compress retrieved passages: {e}")
+            return query_results
+
+    @staticmethod
+    def _memory_collection_name(thread_id: str) -> str:
+        """Name of the memory collection of a conversation (thread ids may be any text)."""
+        import hashlib
 
+        return MEMORY_COLLECTION_PREFIX + hashlib.sha256(thread_id.encode("utf-8")).hexdigest()[:32]
+
+    def remember_turn(self, thread_id: str, user_message: str, answer: str) -> None:
+        """
+        Embed a completed turn into the memory collection of its conversation, dropping
+        its oldest turns beyond `MEMORY_MAX_TURNS`.
+        """
+        text = f"User: {user_message.strip()}\nAssistant: {answer.strip()}"[:MEMORY_TURN_CHARS]
+
+        collection_name = self._memory_collection_name(thread_id)
+        try:
+            self.manifest.add_memory(collection_name)
+            collection = self.db_client.get_or_create_collection(
+                name=collection_name,
+                metadata={"hnsw:space": "cosine"},
+            )
+            turns = sorted(meta["turn"] for meta in collection.get(include=["metadatas"])["metadatas"])
+            turn = turns[-1] + 1 if turns else 0
+            collection.add(
+                ids=[f"turn_{turn}"],
+                documents=[text],
+                metadatas=[{"turn": turn, "ts": time.time()}],
+                embeddings=self._embed_batch([text]),
+            )
+
+            expired = turns[: max(0, len(turns) + 1 - MEMORY_MAX_TURNS)]
+            if expired:
+                collection.delete(ids=[f"turn_{t}" for t in expired])
         except Exception:
             raise DBAccessError()
 
+    def recall_turns(
+        self, thread_id: str, query: str, n_results: int, recent_turns: int
+    ) -> list[str]:
+        """
+        The past turns of a conversation closest to a query, oldest first, leaving out
+        the last `recent_turns` turns (they are still in the model's context).
+        """
+        import chromadb.errors as chromadb_errors
+
         try:
-            results = collection.get(
-                where={"file_path": file_path},
-                limit=1,
+            collection = self.db_client.get_collection(
+                name=self._memory_collection_name(thread_id)
             )
-            return bool(results["metadatas"])
+        except chromadb_errors.NotFoundError:
+            return []
+        except Exception:
+            raise DBAccessError()
+
+        try:
+            turns = [meta["turn"] for meta in collection.get(include=["metadatas"])["metadatas"]]
+            older = max(turns, default=-1) + 1 - recent_turns
+            candidates = sum(turn < older for turn in turns)
+            if not candidates:
+                return []
 
+            results = collection.query(
+                query_embeddings=self._embed_batch([query]),
+                n_results=min(n_results, candidates),
+                where={"turn": {"$lt": older}},
+                include=["documents", "metadatas"],
+            )
         except Exception:
             raise DBAccessError()
 
-    def store_document(self, file_path: str, collection_name: str) -> None:
-        """Store document content and metadata in ChromaDB."""
-        if self.already_stored(file_path, collection_name):
-            return
+        turns = sorted(
+            zip(results["metadatas"][0], results["documents"][0]),
+            key=lambda x: x[0]["turn"],
+        )
+        return [doc for _, doc in turns]
 
-        response = self.scraper.scrape(file_path)
-        content = response["content"]
-        metadata = response["metadata"]
+    def prune_memories(self) -> int:
+        """
+        Delete the memory collections of conversations without a turn in the last
+        `MEMORY_RETENTION_DAYS` days. Returns how many were deleted.
+        """
+        cutoff = time.time() - MEMORY_RETENTION_DAYS * 24 * 3600
+
+        import chromadb.errors as chromadb_errors
+
+        pruned = 0
+        try:
+            for collection_name in self.manifest.memory_collections():
+                try:
+                    metadatas = self.db_client.get_collection(name=collection_name).get(
+                        include=["metadatas"]
+                    )["metadatas"]
+                except chromadb_errors.NotFoundError:
+                    self.manifest.remove_memory(collection_name)
+                    continue
+                # turns remembered before timestamps were recorded count as idle
+                if max((meta.get("ts", 0) for meta in metadatas), default=0) < cutoff:
+                    self.db_client.delete_collection(name=collection_name)
+                    self.manifest.remove_memory(collection_name)
+                    pruned += 1
+        except Exception:
+            raise DBAccessError()
+
+        if pruned:
+            logger.info(f"Deleted {pruned} idle conversation memories")
+        return pruned
 
-        chunks = [
+    def get_document_paths(self, metadata: dict[str, Any]) -> list[str]:
+        """Every indexed path holding the content of a retrieved chunk."""
+        indexed = [name for name, enabled in self.indexed_collections.items() if enabled]
+        paths = self.manifest.paths_for_hash(metadata.get("hash", ""), indexed)
+        if not paths and metadata.get("file_path"):
+            return [metadata["file_path"]]
+        return paths
+
+    @staticmethod
+    def _chunk(content: str) -> list[str]:
+        """Split content into overlapping chunks."""
+        return [
             content[i : i + CHUNK_SIZE]
             for i in range(0, len(content), CHUNK_SIZE - CHUNK_OVERLAP)
         ]
 
-        if collection_name not in self.indexed_collections:
-            self.indexed_collections[collection_name] = True  # default to indexed
-            self._save_indexed_collections()
+    @property
+    def batch_size(self) -> int:
+        """Number of chunks sent to the embedder per request."""
+        tuned = self.batch_tuner.get(self.embedder)
+        if tuned:
+            return tuned["batch_size"]
+        return self.embedder.max_batch_items or BATCH_SIZE
+
+    def _apply_batch_size(self, batch_size: int) -> None:
+        """Use a tuned batch size for local models that batch internally as well."""
+        if hasattr(self.embedder, "batch_size"):
+            self.embedder.batch_size = batch_size
+
+    def _throttle(self) -> None:
+        """Wait until the embedder's minimum interval between requests has elapsed."""
+        interval = self.embedder.min_request_interval
+        if not interval:
+            return
 
-        collection = self.db_client.get_or_create_collection(
-            name=collection_name,
-        )
+        with self._rate_lock:
+            wait = self._last_request_time + interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_request_time = time.monotonic()
+
+    def _embed_batch(self, batch: list[str]) -> list[list[float]]:
+        """Embed a single batch while respecting the embedder's rate limit."""
+        self._throttle()
+        return self.embedding_function(batch)
+
+    def _embed_batches(self, chunks: list[str]) -> Iterator[list[list[float]]]:
+        """
+        Embed chunks in batches sized for the active embedder.
+        Batches are yielded in order, even when several requests are in flight.
+        """
+        batches = [
+            chunks[i : i + self.batch_size]
+            for i in range(0, len(chunks), self.batch_size)
+        ]
 
-        embeddings = []
-        
-        for i in range(0, len(chunks), BATCH_SIZE):
-            time.sleep(5)  # TODO: adjust delay based on rate limits
-            embeddings.extend(self.embedding_function(chunks[i : i + BATCH_SIZE]))
-
-        collection.add(
-            documents=chunks,
-            metadatas=[metadata] * len(chunks),
-            embeddings=embeddings,
-            ids=[f"{metadata['hash']}_{i}" for i in range(len(chunks))],
-        )
+        if self.embedder.max_concurrency <= 1 or len(batches) <= 1:
+            for batch in batches:
+                yield self._embed_batch(batch)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.embedder.max_concurrency) as executor:
+            yield from executor.map(self._embed_batch, batches)
 
     def was_modified(self, file_path: str, collection_name: str) -> bool:
         """Check if the file has been modified by comparing hashes and modification dates."""
         import chromadb.errors as chromadb_errors
 
+        # a partly ingested file always needs to be resumed
+        if self.manifest.get_checkpoint(collection_name, file_path) is not None:
+            return True
+
+        # cheap path: same size and mtime as when the manifest recorded it
+        stat = Path(file_path).stat()
+        if self.manifest.is_unchanged(
+            collection_name, file_path, stat.st_size, stat.st_mtime
+        ):
+            return False
+
         last_hash = self.scraper.get_hash(file_path)
         last_mod_date = datetime.fromtimestamp(
             Path(file_path).stat().st_mtime
@@ -218,15 +1001,72 @@ class DataBaseClient:
 
         return last_hash != stored_hash or last_mod_date != stored_mod_date
 
-    def store_documents(self, directory_path: str, collection_name: str) -> None:
-        """Store all documents from a directory into the database."""
+    def member_was_modified(self, member: ArchiveMember, collection_name: str) -> bool:
+        """Check if an archive member changed since it was ingested (by size and modification time)."""
+        if self.manifest.get_checkpoint(collection_name, member.path) is not None:
+            return True
+
+        return not self.manifest.is_unchanged(
+            collection_name, member.path, member.size, member.mtime
+        )
+
+    @staticmethod
+    def _iter_members(
+        archive_path: str, errors: list[Exception] | None = None
+    ) -> Iterator[ArchiveMember]:
+        """
+        Yield the members of an archive, reporting (and skipping) unreadable archives.
+        The read error is appended to `errors`, if given.
+        """
+        try:
+            yield from iter_archive_members(archive_path)
+        except ScrapingFailedError as e:
+            if errors is not None:
+                errors.append(e)
+            logger.error(f"Failed to read archive: {archive_path}", exc_info=e)
+            default_ui.error(UI_MESSAGES["errors"]["failed_read_archive"])
+
+    @contextmanager
+    def _bulk_embedder(self, workers: int | None):
+        """
+        Temporarily embed through a pool of worker processes (bulk ingestion mode).
+        Only local Hugging Face models can be spread over processes.
+        """
+        from app.src.embeddings.embedding_functions.hf_embed import HFEmbedder
+
+        if not workers or not isinstance(self.embedder, HFEmbedder):
+            if workers:
+                default_ui.warning(UI_MESSAGES["warnings"]["bulk_mode_unsupported"])
+            yield
+            return
+
+        from app.src.embeddings.embedding_functions.hf_pool import HFEmbeddingPool
+
+        embedder = self.embedder
+        pool = HFEmbeddingPool(embedder, workers=workers)
+        try:
+            pool.start()
+        except RuntimeError as e:
+            logger.warning(f"Failed to start the bulk ingestion pool: {e}")
+            default_ui.warning(UI_MESSAGES["warnings"]["bulk_mode_failed"])
+            yield
+            return
 
+        self.embedder, self.embedding_function = pool, pool.get_embeddings
+        try:
+            yield
+        finally:
+            pool.close()
+            self.embedder, self.embedding_function = embedder, embedder.get_embeddings
+
+    def _resolve_path(self, directory_path: str) -> str | None:
+        """Validate and normalize a user supplied path. Returns None (and reports) if unusable."""
         if not validate_dir_name(directory_path):
             logger.error(f"Invalid directory path: {directory_path}")
             default_ui.error(
                 UI_MESSAGES["errors"]["invalid_directory_path"]
             )
-            return
+            return None
 
         # Normalize the path
         directory_path = Path(directory_path)
@@ -236,51 +1076,365 @@ class DataBaseClient:
         else:
             directory_path = Path(os.path.expanduser(str(directory_path)))
 
-        directory_path = directory_path.resolve()
-        directory_path = str(directory_path)
+        directory_path = str(directory_path.resolve())
 
-        # If it's a file, just process that single file
+        if not os.path.exists(directory_path):
+            logger.error(f"Directory does not exist: {directory_path}")
+            default_ui.error(
+                UI_MESSAGES["errors"]["directory_not_exist"]
+            )
+            return None
+
+        return directory_path
+
+    @staticmethod
+    def _iter_files(directory_path: str) -> Iterator[str]:
+        """
+        Yield the files to ingest: the path itself if it's a file, else every file below it.
+        Archives are yielded as well, their members are read by the caller.
+        """
         if os.path.isfile(directory_path):
+            yield directory_path
+            return
+
+        for root, _, files in os.walk(directory_path):
+            for file in files:
+                yield os.path.join(root, file)
+
+    def store_documents(
+        self,
+        directory_path: str,
+        collection_name: str,
+        workers: int = None,
+        calibrate: bool = False,
+        dims: int = None,
+        rescore: str = None,
+        index_params: dict = None,
+    ) -> None:
+        """
+        Store all documents from a directory into the database.
+
+        `dims` and `rescore` set the collection's vector storage (see `configure_storage`),
+        `index_params` its HNSW parameters (see `configure_index`).
+
+        In a git repository only the files changed since the commit recorded on the
+        last complete run are looked at, and files deleted since are removed.
+        """
+        directory_path = self._resolve_path(directory_path)
+        if directory_path is None:
+            return
+
+        # compaction of the collection waits for the run to finish, and the other way round
+        with self._collection_lock(collection_name):
+            self.configure_index(collection_name, index_params)
+            self.configure_storage(collection_name, dims, rescore)
+
+            git = self._git_changes(directory_path, collection_name)
+            if git is not None:
+                for file_path in git["deleted"]:
+                    self._remove_path(collection_name, file_path)
+
+            failed = False
+            with self._bulk_embedder(workers):
+                if calibrate:
+                    self.calibrate_batch_size(directory_path)
+
+                # one document at a time: deduplication and copies rely on it, the
+                # embedding batches of each document are what is spread over workers
+                files = git["changed"] if git is not None else self._iter_files(directory_path)
+                for file_path in files:
+                    failed |= not self._store_path(file_path, collection_name)
+
+            # failed files are retried on the next run, so the commit only moves on a clean run
+            if git is not None and git["head"] and not failed:
+                self.manifest.set_git_commit(
+                    collection_name, directory_path, git["head"], git["uncommitted"]
+                )
+
+            default_ui.status_message(
+                title=UI_MESSAGES["titles"]["info"],
+                message=UI_MESSAGES["success"]["documents_embedded"].format(
+                    directory_path, collection_name
+                ),
+                style="success",
+            )
+
+    def _store_path(self, file_path: str, collection_name: str) -> bool:
+        """Store a file, or the members of an archive, if changed. Returns False if it couldn't be read."""
+        if is_archive(file_path):
+            return self._store_archive(file_path, collection_name)
+
+        try:
+            if self.was_modified(file_path, collection_name):
+                self.store_document(file_path, collection_name)
+
+        except ScrapingFailedError as e:
+            logger.error(f"Failed to scrape file: {file_path}", exc_info=e)
+            default_ui.error(
+                UI_MESSAGES["errors"]["failed_scrape"]
+            )
+            return False
+
+        return True
+
+    def _git_changes(self, directory_path: str, collection_name: str) -> dict | None:
+        """
+        Ask git which files to ingest when the directory is inside a repository.
+
+        Files that were modified or untracked at the last run are looked at again:
+        git doesn't report them once they are reverted, or deleted while untracked.
+        Ingested files git doesn't list (ignored ones, e.g. embedded before the
+        directory became a repository) are removed.
+
+        Returns:
+            dict | None: {"head": str | None, "changed": [paths], "deleted": [paths],
+            "uncommitted": [paths]} with absolute paths, except for "uncommitted" (the
+            files differing from `head` now, relative to the directory), or None when
+            the whole tree has to be walked.
+        """
+        if not os.path.isdir(directory_path):
+            return None
+
+        head = get_head_commit(directory_path)
+        since = self.manifest.get_git_commit(collection_name, directory_path)
+
+        files = list_files(directory_path)
+        if files is None:
+            return None
+
+        changes = get_changed_files(since, directory_path) if since else None
+        if changes is None:
+            # first run (or the recorded commit is gone): every file git knows of
+            changes = {"changed": files, "deleted": []}
+
+        def absolute(path: str) -> str:
+            return os.path.normpath(os.path.join(directory_path, path))
+
+        changed, deleted = set(changes["changed"]), set(changes["deleted"])
+        for path in self.manifest.get_git_uncommitted(collection_name, directory_path):
+            (changed if os.path.isfile(absolute(path)) else deleted).add(path)
+
+        listed = {absolute(path) for path in files}
+        prefix = os.path.join(directory_path, "")
+        for entry in self.manifest.files(collection_name):
+            # archive members go with their archive
+            path = entry["file_path"].split(ARCHIVE_SEPARATOR, 1)[0]
+            if path.startswith(prefix) and path not in listed:
+                deleted.add(os.path.relpath(path, directory_path))
+        deleted -= changed
+
+        # what differs from `head` now, to look at again on the next run
+        pending = get_changed_files(head, directory_path) if head else None
+        uncommitted = (
+            {*pending["changed"], *pending["deleted"]} if pending is not None else changed | deleted
+        )
+
+        logger.info(
+            f"Git changes in {directory_path} since {since or 'the start'}: "
+            f"{len(changed)} changed, {len(deleted)} deleted"
+        )
+
+        return {
+            "head": head,
+            "changed": [
+                absolute(path)
+                for path in sorted(changed)
+                if os.path.isfile(absolute(path))
+            ],
+            "deleted": [absolute(path) for path in sorted(deleted)],
+            "uncommitted": sorted(uncommitted),
+        }
+
+    def _remove_path(self, collection_name: str, file_path: str) -> None:
+        """Remove a deleted file (or every member of a deleted archive) from a collection."""
+        import chromadb.errors as chromadb_errors
+
+        try:
+            collection = self.db_client.get_collection(name=collection_name)
+        except chromadb_errors.NotFoundError:
+            return
+        except Exception:
+            raise DBAccessError()
+
+        member_prefix = member_path(file_path, "")
+        for entry in self.manifest.files(collection_name):
+            if entry["file_path"] == file_path or entry["file_path"].startswith(member_prefix):
+                self._unlink_path(collection, entry["file_path"])
+
+    def _store_archive(self, archive_path: str, collection_name: str) -> bool:
+        """
+        Store every changed member of an archive, streaming them without extraction.
+        Returns False if the archive or one of its members could not be read.
+        """
+        ok = True
+        errors: list[Exception] = []
+        for member in self._iter_members(archive_path, errors):
             try:
-                if self.was_modified(directory_path, collection_name):
-                    self.store_document(directory_path, collection_name)
+                if self.member_was_modified(member, collection_name):
+                    self.store_archive_member(member, collection_name)
 
             except ScrapingFailedError as e:
-                logger.error(f"Failed to scrape file: {directory_path}", exc_info=e)
+                ok = False
+                logger.error(f"Failed to scrape file: {member.path}", exc_info=e)
                 default_ui.error(
                     UI_MESSAGES["errors"]["failed_scrape"]
                 )
 
-            except:
-                raise
+        return ok and not errors
 
-        if not os.path.exists(directory_path):
-            logger.error(f"Directory does not exist: {directory_path}")
-            default_ui.error(
-                UI_MESSAGES["errors"]["directory_not_exist"]
+    def estimate_ingestion(self, directory_path: str, collection_name: str) -> dict | None:
+        """
+        Estimate what `store_documents` would do, without calling the embedder.
+
+        Returns:
+            dict: File, byte, chunk and token counts plus time and cost estimates.
+        """
+        directory_path = self._resolve_path(directory_path)
+        if directory_path is None:
+            return None
+
+        estimate = {
+            "files": 0,
+            "bytes": 0,
+            "unchanged_files": 0,
+            "changed_files": 0,
+            "changed_bytes": 0,
+            "linked_files": 0,
+            "failed_files": 0,
+            "chunks": 0,
+            "tokens": 0,
+        }
+
+        git = self._git_changes(directory_path, collection_name)
+        files = git["changed"] if git is not None else self._iter_files(directory_path)
+
+        for file_path in files:
+            if is_archive(file_path):
+                for member in self._iter_members(file_path):
+                    self._estimate_document(
+                        estimate,
+                        collection_name,
+                        member.path,
+                        member.size,
+                        member.mtime,
+                        get_hash=lambda m=member: self.scraper.get_bytes_hash(m.read()),
+                        scrape=lambda m=member: self.scraper.scrape_stream(
+                            io.BytesIO(m.read()), m.path, m.mtime
+                        ),
+                    )
+                continue
+
+            stat = Path(file_path).stat()
+            self._estimate_document(
+                estimate,
+                collection_name,
+                file_path,
+                stat.st_size,
+                stat.st_mtime,
+                get_hash=lambda f=file_path: self.scraper.get_hash(f),
+                scrape=lambda f=file_path: self.scraper.scrape(f),
             )
+
+        # wall time: measured throughput if calibrated, bounded below by the rate limit
+        requests = -(-estimate["chunks"] // self.batch_size)
+        rate_limited_seconds = requests * self.embedder.min_request_interval
+        tuned = self.batch_tuner.get(self.embedder)
+        if tuned and tuned["chunks_per_sec"]:
+            estimate["seconds"] = max(
+                estimate["chunks"] / tuned["chunks_per_sec"], rate_limited_seconds
+            )
+        else:
+            estimate["seconds"] = rate_limited_seconds if rate_limited_seconds else None
+
+        price = self.embedder.cost_per_million_tokens
+        estimate["cost"] = (
+            estimate["tokens"] / 1_000_000 * price if price is not None else None
+        )
+
+        return estimate
+
+    def _estimate_document(
+        self,
+        estimate: dict,
+        collection_name: str,
+        file_path: str,
+        size: int,
+        mtime: float,
+        get_hash: Callable[[], str],
+        scrape: Callable[[], dict],
+    ) -> None:
+        """Add a single file (or archive member) to an ingestion estimate."""
+        estimate["files"] += 1
+        estimate["bytes"] += size
+
+        if self.manifest.is_unchanged(collection_name, file_path, size, mtime):
+            estimate["unchanged_files"] += 1
             return
 
-        for root, _, files in os.walk(directory_path):
-            for file in files:
-                file_path = os.path.join(root, file)
+        # content already embedded with this model is linked or copied, not embedded
+        file_hash = get_hash()
+        if self.manifest.get_document(
+            collection_name, file_hash
+        ) or self.manifest.find_document(
+            file_hash, self.embedder.name, self.embedder.model_name
+        ):
+            estimate["linked_files"] += 1
+            return
+
+        try:
+            chunks = self._chunk(scrape()["content"])
+        except ScrapingFailedError:
+            estimate["failed_files"] += 1
+            return
+
+        estimate["changed_files"] += 1
+        estimate["changed_bytes"] += size
+        estimate["chunks"] += len(chunks)
+        estimate["tokens"] += sum(self.embedder.count_tokens(c) for c in chunks)
+
+    def _iter_contents(self, directory_path: str) -> Iterator[str]:
+        """Yield the scraped content of every readable file (and archive member) under a path."""
+        for file_path in self._iter_files(directory_path):
+            if not is_archive(file_path):
                 try:
-                    if self.was_modified(file_path, collection_name):
-                        self.store_document(file_path, collection_name)
+                    yield self.scraper.scrape(file_path)["content"]
+                except ScrapingFailedError:
+                    pass
+                continue
 
-                except ScrapingFailedError as e:
-                    logger.error(f"Failed to scrape file: {file_path}", exc_info=e)
-                    default_ui.error(
-                        UI_MESSAGES["errors"]["failed_scrape"]
-                    )
+            for member in self._iter_members(file_path):
+                try:
+                    yield self.scraper.scrape_stream(
+                        member.stream, member.path, member.mtime
+                    )["content"]
+                except ScrapingFailedError:
+                    pass
+
+    def _sample_chunks(self, directory_path: str, sample_size: int) -> list[str]:
+        """Collect up to `sample_size` real chunks from the files under a path."""
+        sample = []
+        for content in self._iter_contents(directory_path):
+            sample.extend(self._chunk(content))
+            if len(sample) >= sample_size:
+                break
+        return sample[:sample_size]
+
+    def calibrate_batch_size(self, directory_path: str) -> None:
+        """Benchmark the active embedder on real chunks and keep the fastest batch size."""
+        sample = self._sample_chunks(directory_path, CALIBRATION_SAMPLE_SIZE)
+        if not sample:
+            default_ui.warning(UI_MESSAGES["warnings"]["calibration_no_sample"])
+            return
 
-                except:
-                    raise
+        batch_size, chunks_per_sec = self.batch_tuner.calibrate(
+            self.embedder, self._embed_batch, sample
+        )
+        self._apply_batch_size(batch_size)
 
         default_ui.status_message(
             title=UI_MESSAGES["titles"]["info"],
-            message=UI_MESSAGES["success"]["documents_embedded"].format(
-                directory_path, collection_name
+            message=UI_MESSAGES["success"]["batch_size_calibrated"].format(
+                batch_size, chunks_per_sec
             ),
             style="success",
         )
@@ -296,19 +1450,24 @@ class DataBaseClient:
             return
 
         try:
-            self.db_client.delete_collection(name=collection_name)
-            # Remove from indexed collections and save
-            if collection_name in self.indexed_collections:
-                del self.indexed_collections[collection_name]
-                self._save_indexed_collections()
-
-                default_ui.status_message(
-                    title=UI_MESSAGES["titles"]["collection_deleted"],
-                    message=UI_MESSAGES["messages"]["collection_deleted"].format(
-                        collection_name
-                    ),
-                    style="success",
-                )
+            with self._collection_lock(collection_name):
+                self.db_client.delete_collection(name=collection_name)
+                self.manifest.drop_collection(collection_name)
+                self.vector_store.drop_collection(collection_name)
+                # cached results hold the text of its passages (keys don't tell collections apart)
+                self.query_cache.clear()
+                # Remove from indexed collections and save
+                if collection_name in self.indexed_collections:
+                    del self.indexed_collections[collection_name]
+                    self._save_indexed_collections()
+
+                    default_ui.status_message(
+                        title=UI_MESSAGES["titles"]["collection_deleted"],
+                        message=UI_MESSAGES["messages"]["collection_deleted"].format(
+                            collection_name
+                        ),
+                        style="success",
+                    )
 
         except chromadb_errors.NotFoundError as e:
             logger.warning(f"Collection not found: {collection_name}", exc_info=e)
@@ -323,10 +1482,12 @@ class DataBaseClient:
         """List all collections in the database."""
         try:
             collections = self.db_client.list_collections()
+            hidden = self._internal_collections()
             # answer in the format "- collection_name: is_indexed"
             lines = [
                 f"• {col.name}: {'Indexed' if self.indexed_collections.get(col.name, False) else 'Unindexed'}"
                 for col in collections
+                if col.name not in hidden
             ]
             listed_collections = "\n".join(lines) if lines else "No collections found."
 
@@ -339,6 +1500,505 @@ class DataBaseClient:
         except Exception:
             raise DBAccessError()
 
+    def collection_names(self) -> list[str]:
+        """Names of all collections in the database."""
+        try:
+            hidden = self._internal_collections()
+            return [
+                col.name
+                for col in self.db_client.list_collections()
+                if col.name not in hidden
+            ]
+        except Exception:
+            raise DBAccessError()
+
+    def _internal_collections(self) -> set[str]:
+        """Collections hidden from the user: conversation memories and `/compact` copies."""
+        hidden = self.manifest.memory_collections()
+        for entry in self.manifest.compactions().values():
+            hidden |= {entry["staging"], entry["retired"]}
+        return hidden
+
+    def collection_stats(self, collection_name: str) -> dict | None:
+        """
+        Size, content and latency statistics of a collection, from the collection
+        itself (chunk count), the ingestion manifest and the index files on disk.
+
+        Returns:
+            dict | None: The statistics, or None if the collection doesn't exist.
+        """
+        import chromadb.errors as chromadb_errors
+
+        try:
+            collection = self.db_client.get_collection(name=collection_name)
+            chunk_count = collection.count()
+        except chromadb_errors.NotFoundError:
+            return None
+        except Exception:
+            raise DBAccessError()
+
+        totals = self.manifest.collection_totals(collection_name)
+        info = self.manifest.get_collection(collection_name) or {}
+        latencies = sorted(self.manifest.latencies(collection_name))
+
+        chunked_chars = sum(
+            self._chunked_chars(doc["chars"], doc["chunks"])
+            for doc in self.manifest.documents(collection_name)
+        )
+
+        def percentile(p: float) -> float | None:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+
+        return {
+            "name": collection_name,
+            "indexed": self.indexed_collections.get(collection_name, False),
+            "chunks": chunk_count,
+            "aliases": self.manifest.alias_count(collection_name),
+            "documents": totals["documents"],
+            "files": totals["files"],
+            "chars": totals["chars"],
+            "avg_chunk_chars": chunked_chars / totals["chunks"] if totals["chunks"] else None,
+            "provider": info.get("provider"),
+            "model": info.get("model"),
+            "dimensions": info.get("dimensions"),
+            "last_ingest": info.get("last_ingest"),
+            "storage": self.manifest.get_storage(collection_name),
+            "index_params": {
+                name: (collection.metadata or {})[key]
+                for name, key in INDEX_PARAMS.items()
+                if key in (collection.metadata or {})
+            },
+            "index_bytes": self._index_size(collection.id),
+            "queries": len(latencies),
+            "p50": percentile(50),
+            "p95": percentile(95),
+            "p99": percentile(99),
+        }
+
+    @staticmethod
+    def _chunked_chars(chars: int, chunks: int) -> int:
+        """Total length of the chunks `_chunk` cuts a document of `chars` characters into."""
+        step = CHUNK_SIZE - CHUNK_OVERLAP
+        # chunks starting at least CHUNK_SIZE before the end are full, the rest run to the end
+        full = min(chunks, (chars - CHUNK_SIZE) // step + 1) if chars >= CHUNK_SIZE else 0
+        return full * CHUNK_SIZE + sum(chars - i * step for i in range(full, chunks))
+
+    @staticmethod
+    def _index_size(collection_id) -> int | None:
+        """Bytes used by the vector index segment of a collection, None if it can't be located."""
+        import sqlite3
+
+        try:
+            with sqlite3.connect(f"file:{DB_PATH / 'chroma.sqlite3'}?mode=ro", uri=True) as conn:
+                rows = conn.execute(
+                    "SELECT id FROM segments WHERE collection = ? AND scope = 'VECTOR'",
+                    (str(collection_id),),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read the segments of collection {collection_id}: {e}")
+            return None
+
+        size = 0
+        for (segment_id,) in rows:
+            for root, _, files in os.walk(DB_PATH / segment_id):
+                size += sum(os.path.getsize(os.path.join(root, file)) for file in files)
+        return size
+
+    def compact_collection(self, collection_name: str) -> dict | None:
+        """
+        Garbage-collect a collection and rebuild its vector index.
+
+        Files that no longer exist are forgotten, chunks no file holds any more
+        (superseded content, left-overs of removed files) are deleted, and what remains
+        is copied into a fresh collection that replaces the old one, leaving the deleted
+        entries of the HNSW index behind. Queries keep using the old collection until
+        the copy is swapped in, writes to the collection wait until it's done. The
+        compaction is recorded in the manifest, an interrupted one is completed or
+        discarded on the next start.
+
+        Returns:
+            dict: {"missing_files", "orphaned_chunks", "chunks", "bytes_before",
+                "bytes_after", "probes", "latency_before", "latency_after"} (latencies
+                are median seconds), None if the collection doesn't exist.
+        """
+        import chromadb.errors as chromadb_errors
+
+        # embedding, indexing, importing or deleting the collection meanwhile waits
+        with self._collection_lock(collection_name):
+            try:
+                self._recover_compaction(collection_name)
+                collection = self.db_client.get_collection(name=collection_name)
+            except chromadb_errors.NotFoundError:
+                return None
+            except Exception:
+                raise DBAccessError()
+
+            try:
+                probes = self._probe_embeddings(collection)
+                bytes_before = self._index_size(collection.id)
+                latency_before = self._probe_latency(collection, probes)
+
+                missing_files = 0
+                for entry in self.manifest.files(collection_name):
+                    if self._path_removed(entry["file_path"]):
+                        self._unlink_path(collection, entry["file_path"])
+                        missing_files += 1
+
+                orphaned_chunks = self._delete_orphaned_chunks(collection)
+
+                collection = self._rebuild_collection(collection)
+                self.manifest.bump_generation(collection_name)
+
+                return {
+                    "missing_files": missing_files,
+                    "orphaned_chunks": orphaned_chunks,
+                    "chunks": collection.count(),
+                    "bytes_before": bytes_before,
+                    "bytes_after": self._index_size(collection.id),
+                    "probes": len(probes),
+                    "latency_before": latency_before,
+                    "latency_after": self._probe_latency(collection, probes),
+                }
+            except Exception:
+                raise DBAccessError()
+
+    def _recover_compactions(self) -> None:
+        """Complete or discard every compaction recorded in the manifest as interrupted."""
+        try:
+            names = {col.name for col in self.db_client.list_collections()}
+            for collection_name in self.manifest.compactions():
+                self._recover_compaction(collection_name, names)
+        except Exception:
+            raise DBAccessError()
+
+    def _recover_compaction(self, collection_name: str, names: set[str] = None) -> None:
+        """Complete or discard an interrupted compaction of a collection (see `_rebuild_collection`)."""
+        entry = self.manifest.compactions().get(collection_name)
+        if entry is None:
+            return
+        if names is None:
+            names = {col.name for col in self.db_client.list_collections()}
+        staging, retired = entry["staging"], entry["retired"]
+
+        if collection_name not in names:
+            # interrupted between the renames of the swap, the copy is complete
+            restored = staging if staging in names else retired
+            if restored in names:
+                self.db_client.get_collection(name=restored).modify(name=collection_name)
+                names.discard(restored)
+                names.add(collection_name)
+                logger.info(f"Restored {collection_name} from its interrupted compaction")
+        # the copy may be partial (the original is intact) or already swapped in
+        for name in (staging, retired):
+            if name in names:
+                self.db_client.delete_collection(name=name)
+                names.discard(name)
+        self.manifest.finish_compaction(collection_name)
+
+    def _rebuild_collection(self, collection):
+        """
+        Copy a collection into a new index with the same settings and swap them: the
+        original is renamed out of the way and the copy takes its name, so the
+        collection is missing only between two renames.
+        """
+        import uuid
+
+        name = collection.name
+        token = uuid.uuid4().hex
+        staging_name, retired_name = f"compact-{token}-new", f"compact-{token}-old"
+        self.manifest.start_compaction(name, staging_name, retired_name)
+
+        staging = self.db_client.create_collection(
+            name=staging_name, metadata=collection.metadata or None
+        )
+
+        page_size = self.db_client.get_max_batch_size()
+        for offset in range(0, collection.count(), page_size):
+            page = collection.get(
+                limit=page_size,
+                offset=offset,
+                include=["documents", "metadatas", "embeddings"],
+            )
+            staging.add(
+                ids=page["ids"],
+                documents=page["documents"],
+                metadatas=page["metadatas"],
+                embeddings=page["embeddings"],
+            )
+
+        collection.modify(name=retired_name)
+        staging.modify(name=name)
+        self.db_client.delete_collection(name=retired_name)
+        self.manifest.finish_compaction(name)
+        return staging
+
+    def _delete_orphaned_chunks(self, collection) -> int:
+        """
+        Delete the chunks of documents no file of the collection holds any more.
+
+        Chunks the manifest doesn't know of (embedded before it existed) are only
+        deleted if their file is gone or now holds other content.
+        """
+        valid_hashes = {
+            doc["hash"] for doc in self.manifest.documents(collection.name)
+        } | self.manifest.checkpoint_hashes(collection.name)
+        tracked_paths = {entry["file_path"] for entry in self.manifest.files(collection.name)}
+
+        orphans, orphan_hashes = [], set()
+        page_size = self.db_client.get_max_batch_size()
+        for offset in range(0, collection.count(), page_size):
+            page = collection.get(limit=page_size, offset=offset, include=["metadatas"])
+            for chunk_id, metadata in zip(page["ids"], page["metadatas"]):
+                file_hash = metadata.get("hash")
+                file_path = metadata.get("file_path")
+                if file_hash in valid_hashes or file_path is None:
+                    continue
+                if file_path in tracked_paths or self._path_removed(file_path):
+                    orphans.append(chunk_id)
+                    orphan_hashes.add(file_hash)
+
+        for start in range(0, len(orphans), page_size):
+            collection.delete(ids=orphans[start : start + page_size])
+        for file_hash in orphan_hashes - {None}:
+            self.vector_store.delete_document(collection.name, file_hash)
+            self._restore_aliases(
+                collection, self.manifest.remove_chunks(collection.name, file_hash)
+            )
+
+        return len(orphans)
+
+    @staticmethod
+    def _path_removed(file_path: str) -> bool:
+        """
+        Whether a stored path (for archive members, their archive) was removed. Files
+        whose directory is missing too are kept, it may be an unmounted drive.
+        """
+        if os.path.exists(file_path):
+            return False
+        archive_path, separator, _ = file_path.partition(ARCHIVE_SEPARATOR)
+        if separator and os.path.isfile(archive_path):
+            return False
+        return os.path.isdir(os.path.dirname(archive_path))
+
+    @staticmethod
+    def _probe_embeddings(collection) -> list:
+        """Stored vectors of a few chunks, used as queries to measure latency."""
+        page = collection.get(limit=COMPACT_PROBE_QUERIES, include=["embeddings"])
+        return list(page["embeddings"]) if page["embeddings"] is not None else []
+
+    @staticmethod
+    def _probe_latency(collection, probes: list) -> float | None:
+        """Median latency of querying a collection with the probe vectors."""
+        import statistics
+
+        n_results = min(MAX_RESULTS, collection.count())
+        if not probes or not n_results:
+            return None
+
+        # the first query loads the index
+        collection.query(query_embeddings=[probes[0]], n_results=n_results, include=["distances"])
+        timings = []
+        for probe in probes:
+            started = time.perf_counter()
+            collection.query(query_embeddings=[probe], n_results=n_results, include=["distances"])
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
+
+    def compact_database(self) -> int:
+        """
+        Reclaim the space left behind by deleted collections: vector index directories
+        no collection uses any more, rescoring copies of deleted collections, and free
+        pages of the SQLite files next to the database. Idle conversation memories are
+        deleted first (see `prune_memories`).
+
+        Returns:
+            int: The bytes reclaimed.
+        """
+        import sqlite3
+        import shutil
+        import uuid
+
+        self.prune_memories()
+
+        try:
+            with sqlite3.connect(f"file:{DB_PATH / 'chroma.sqlite3'}?mode=ro", uri=True) as conn:
+                segments = {row[0] for row in conn.execute("SELECT id FROM segments")}
+        except sqlite3.Error:
+            raise DBAccessError()
+
+        def size_of(path: Path) -> int:
+            if path.is_file():
+                return path.stat().st_size
+            return sum(
+                os.path.getsize(os.path.join(root, file))
+                for root, _, files in os.walk(path)
+                for file in files
+            )
+
+        reclaimed = 0
+        for entry in DB_PATH.iterdir():
+            try:
+                uuid.UUID(entry.name)
+            except ValueError:
+                continue
+            if entry.is_dir() and entry.name not in segments:
+                reclaimed += size_of(entry)
+                shutil.rmtree(entry, ignore_errors=True)
+
+        try:
+            existing = {col.name for col in self.db_client.list_collections()}
+        except Exception:
+            raise DBAccessError()
+        for collection_name in self.vector_store.collection_names():
+            if collection_name not in existing:
+                self.vector_store.drop_collection(collection_name)
+
+        for store in (self.manifest, self.vector_store):
+            before = size_of(store.path)
+            store.vacuum()
+            reclaimed += max(0, before - size_of(store.path))
+
+        return reclaimed
+
+    def export_collection(self, collection_name: str, file_path: str) -> None:
+        """
+        Export a collection to a portable bundle (see `bundle.write_bundle`): its chunks,
+        metadata, float16 embeddings and ingestion manifest, to be imported elsewhere
+        without re-embedding.
+        """
+        import chromadb.errors as chromadb_errors
+        import numpy as np
+
+        try:
+            collection = self.db_client.get_collection(name=collection_name)
+        except chromadb_errors.NotFoundError:
+            default_ui.error(UI_MESSAGES["errors"]["collection_not_exist"])
+            return
+        except Exception:
+            raise DBAccessError()
+
+        records = {"ids": [], "documents": [], "metadatas": []}
+        pages = []
+        try:
+            page_size = self.db_client.get_max_batch_size()
+            for offset in range(0, collection.count(), page_size):
+                page = collection.get(
+                    limit=page_size,
+                    offset=offset,
+                    include=["documents", "metadatas", "embeddings"],
+                )
+                records["ids"].extend(page["ids"])
+                records["documents"].extend(page["documents"])
+                records["metadatas"].extend(page["metadatas"])
+                pages.append(np.asarray(page["embeddings"], dtype=np.float16))
+        except Exception:
+            raise DBAccessError()
+
+        info = self.manifest.get_collection(collection_name) or {}
+        embeddings = (
+            np.concatenate(pages)
+            if pages
+            else np.zeros((0, info.get("dimensions") or 0), dtype=np.float16)
+        )
+
+        file_path = os.path.expanduser(file_path)
+        if not file_path.endswith(".npz"):
+            file_path += ".npz"
+
+        write_bundle(
+            file_path,
+            embeddings,
+            records,
+            {
+                "name": collection_name,
+                "metadata": collection.metadata,
+                **self.manifest.export_collection(collection_name),
+            },
+        )
+
+        default_ui.status_message(
+            title=UI_MESSAGES["titles"]["info"],
+            message=UI_MESSAGES["success"]["collection_exported"].format(
+                collection_name, len(records["ids"]), file_path
+            ),
+            style="success",
+        )
+
+    def import_collection(self, file_path: str, collection_name: str = None) -> None:
+        """
+        Load a bundle written by `export_collection`, bulk-inserting the stored
+        embeddings without calling the embedder.
+        """
+        file_path = os.path.expanduser(file_path)
+        try:
+            embeddings, records, bundle = read_bundle(file_path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read bundle: {file_path}", exc_info=e)
+            default_ui.error(UI_MESSAGES["errors"]["invalid_bundle"])
+            return
+
+        collection_name = collection_name or bundle["name"]
+        info = bundle.get("collection") or {}
+
+        if info.get("model") and (
+            info.get("provider") != self.embedder.name
+            or info.get("model") != self.embedder.model_name
+        ):
+            default_ui.warning(
+                UI_MESSAGES["warnings"]["bundle_model_mismatch"].format(
+                    info.get("provider"), info.get("model")
+                )
+            )
+
+        with self._collection_lock(collection_name):
+            try:
+                if collection_name in self.collection_names():
+                    if not default_ui.confirm(
+                        UI_MESSAGES["confirmations"]["replace_collection"].format(collection_name),
+                        default=False,
+                    ):
+                        return
+                    self.db_client.delete_collection(name=collection_name)
+
+                collection = self.db_client.create_collection(
+                    name=collection_name, metadata=bundle.get("metadata") or None
+                )
+
+                batch_size = self.db_client.get_max_batch_size()
+                for start in range(0, len(records["ids"]), batch_size):
+                    end = start + batch_size
+                    collection.add(
+                        ids=records["ids"][start:end],
+                        documents=records["documents"][start:end],
+                        metadatas=records["metadatas"][start:end],
+                        embeddings=embeddings[start:end].astype("float32").tolist(),
+                    )
+
+            except Exception:
+                raise DBAccessError()
+
+            self.manifest.import_collection(collection_name, bundle)
+            self.vector_store.drop_collection(collection_name)
+            for start in range(0, len(embeddings), batch_size):
+                self._update_summary(
+                    collection_name, embeddings[start : start + batch_size].astype("float32").tolist()
+                )
+            storage = self.manifest.get_storage(collection_name)
+            if storage and storage["rescore"]:
+                # bundles only carry the index vectors, there is nothing to rescore with
+                self.manifest.set_storage(collection_name, storage["dims"], None)
+            self.index_collection(collection_name)
+
+        default_ui.status_message(
+            title=UI_MESSAGES["titles"]["info"],
+            message=UI_MESSAGES["success"]["collection_imported"].format(
+                len(records["ids"]), collection_name
+            ),
+            style="success",
+        )
+
     def reset_database(self) -> None:
         """Reset the entire database by deleting all collections."""
         if not default_ui.confirm(
@@ -351,6 +2011,9 @@ class DataBaseClient:
             collections = self.db_client.list_collections()
             for col in collections:
                 self.db_client.delete_collection(name=col.name)
+            self.manifest.reset()
+            self.vector_store.reset()
+            self.query_cache.clear()
             # Clear indexed collections and save
             self.indexed_collections.clear()
             self._save_indexed_collections()
@@ -365,37 +2028,179 @@ class DataBaseClient:
             raise DBAccessError()
 
     def get_query_results(
-        self, query: str, n_results: int = MAX_RESULTS
+        self, query: str, n_results: int = MAX_RESULTS, filters: dict = None
     ) -> list[tuple[str, dict[str, Any]]]:
-        """Query the database and return relevant documents."""
+        """Query the database and return relevant documents (optionally limited by `filters.parse_filters` filters)."""
+        collection_names = [
+            name.strip() for name, indexed in self.indexed_collections.items() if indexed
+        ]
+        if not collection_names:
+            return []
+
+        cache_key = self._cache_key(query, collection_names, n_results, filters)
+        cached = self.query_cache.get(cache_key)
+        if cached is not None:
+            return [(doc, meta) for doc, meta in cached]
+
+        # embedding the query once for every collection
+        try:
+            query_embeddings = self.embedding_function([query])
+        except Exception:
+            raise DBAccessError()
+
         candidates = []
-        # getting the closest documents across the given collections
-        for collection_name in self.indexed_collections.keys():
-            if not self.indexed_collections[collection_name]:
-                continue
+        # getting the closest documents across the collections close enough to the query
+        for collection_name in self._route(collection_names, query_embeddings[0]):
+            where = None
+            if filters:
+                where = self._where_clause(collection_name, filters)
+                if where is None:
+                    # nothing in this collection passes the filters
+                    continue
 
             candidates.extend(
                 self.get_query_results_from_collection(
-                    query, collection_name.strip(), n_results
+                    query,
+                    collection_name,
+                    n_results,
+                    query_embeddings=query_embeddings,
+                    where=where,
                 )
             )
 
         # merging and sorting the results by distance
         candidates.sort(key=lambda x: x[2])
-        # deduplicate by file hash
+        # deduplicate by parent section (by file hash for chunks embedded without one)
         seen = set()
-        query_results = [
+        matches = [
             (doc, meta)
             for doc, meta, _ in candidates
-            if meta.get("hash") not in seen and not seen.add(meta.get("hash"))
+            if (meta.get("hash"), meta.get("parent")) not in seen
+            and not seen.add((meta.get("hash"), meta.get("parent")))
         ][:n_results]
 
+        sections = self.manifest.get_sections(
+            [(meta["hash"], meta["parent"]) for _, meta in matches if "parent" in meta]
+        )
+        query_results = [
+            (sections.get((meta.get("hash"), meta.get("parent")), doc), meta)
+            for doc, meta in matches
+        ]
+
+        self.query_cache.put(cache_key, query_results)
         return query_results
 
+    def _cache_key(
+        self, query: str, collection_names: list[str], n_results: int, filters: dict | None
+    ) -> str:
+        """
+        Key of a retrieval in the query cache: the normalized query and everything the
+        results depend on, including the current generation of each searched collection.
+        """
+        import hashlib
+
+        key = json.dumps(
+            {
+                "query": " ".join(query.lower().split()),
+                "embedder": [self.embedder.name, self.embedder.model_name],
+                "generations": self.manifest.generations(sorted(collection_names)),
+                "n_results": n_results,
+                "filters": filters or {},
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _where_clause(self, collection_name: str, filters: dict) -> dict | None:
+        """
+        Translate retrieval filters into a Chroma `where` clause for a collection.
+
+        Types and dates filter on the chunk metadata. Paths are matched against the
+        paths of the collection in the manifest (see `_path_clause`).
+
+        Returns:
+            dict | None: The clause, or None if no path of the collection matches.
+        """
+        conditions = []
+
+        if filters.get("path"):
+            path_clause = self._path_clause(collection_name, filters["path"])
+            if path_clause is None:
+                return None
+            conditions.append(path_clause)
+
+        if filters.get("type"):
+            conditions.append({"extension": {"$in": filters["type"]}})
+
+        if filters.get("since") is not None:
+            conditions.append({"mod_ts": {"$gte": filters["since"]}})
+
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+    def _path_clause(self, collection_name: str, patterns: list[str]) -> dict | None:
+        """
+        A `where` clause selecting the chunks of the paths matching glob patterns.
+
+        Chunks carry the path and directory of one of the paths holding their content,
+        so directories whose every path matches are selected by their `directory`
+        metadata, and single matching paths by their `file_path`. Content held by
+        several paths is selected by hash, since the chunks only name one of them.
+        Resolved once per collection generation.
+
+        Returns:
+            dict | None: The clause, or None if no path of the collection matches.
+        """
+        generation = self.manifest.generations([collection_name])[collection_name]
+        key = (collection_name, tuple(patterns))
+        cached = self._path_clauses.get(key)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+        entries = self.manifest.files(collection_name)
+        path_counts = Counter(entry["hash"] for entry in entries)
+
+        directories: dict[str, bool] = {}
+        paths, hashes = [], set()
+        for entry in entries:
+            matched = match_path(entry["file_path"], patterns)
+            metadata = self._file_metadata(entry["file_path"], entry["size"], entry["mtime"])
+            directories[metadata["directory"]] = (
+                directories.get(metadata["directory"], True) and matched
+            )
+            if not matched:
+                continue
+            if path_counts[entry["hash"]] > 1:
+                hashes.add(entry["hash"])
+            else:
+                paths.append(metadata)
+
+        whole = {directory for directory, all_matched in directories.items() if all_matched}
+        paths = [meta["file_path"] for meta in paths if meta["directory"] not in whole]
+
+        conditions = []
+        if whole:
+            conditions.append({"directory": {"$in": sorted(whole)}})
+        if paths:
+            conditions.append({"file_path": {"$in": sorted(paths)}})
+        if hashes:
+            conditions.append({"hash": {"$in": sorted(hashes)}})
+
+        clause = None
+        if conditions:
+            clause = conditions[0] if len(conditions) == 1 else {"$or": conditions}
+
+        self._path_clauses[key] = (generation, clause)
+        return clause
+
     def get_query_results_from_collection(
-        self, query: str, collection_name: str, n_results: int = MAX_RESULTS
+        self,
+        query: str,
+        collection_name: str,
+        n_results: int = MAX_RESULTS,
+        query_embeddings: list[list[float]] = None,
+        where: dict = None,
     ) -> list[tuple[str, dict[str, Any], float]]:
-        """Query the database and return relevant documents."""
+        """Query the database and return relevant documents (`query_embeddings` skips embedding the query)."""
         import chromadb.errors as chromadb_errors
 
         try:
@@ -407,13 +2212,23 @@ class DataBaseClient:
         except Exception:
             raise DBAccessError()
 
+        storage = self.manifest.get_storage(collection_name) or {}
+
         try:
+            if query_embeddings is None:
+                query_embeddings = self.embedding_function([query])
+            started = time.perf_counter()
             results = collection.query(
-                query_embeddings=self.embedding_function([query]),
-                n_results=n_results,
+                query_embeddings=truncate(query_embeddings, storage.get("dims")),
+                # rescoring picks the best results among a few times more candidates
+                n_results=n_results * RESCORE_CANDIDATES if storage.get("rescore") else n_results,
+                where=where,
                 include=["documents", "metadatas", "distances"],
             )
-            return list(
+            self.manifest.record_latency(
+                collection_name, time.perf_counter() - started, LATENCY_SAMPLES
+            )
+            candidates = list(
                 zip(
                     results.get("documents", [[]])[0],
                     results.get("metadatas", [[]])[0],
@@ -423,3 +2238,55 @@ class DataBaseClient:
 
         except Exception:
             raise DBAccessError()
+
+        if storage.get("rescore"):
+            candidates = self._rescore(
+                collection_name,
+                storage,
+                (collection.metadata or {}).get(INDEX_PARAMS["space"], "l2"),
+                query_embeddings[0],
+                results["ids"][0],
+                candidates,
+            )
+
+        return candidates[:n_results]
+
+    def _rescore(
+        self,
+        collection_name: str,
+        storage: dict,
+        space: str,
+        query_embedding: list[float],
+        ids: list[str],
+        candidates: list[tuple[str, dict[str, Any], float]],
+    ) -> list[tuple[str, dict[str, Any], float]]:
+        """Re-rank index candidates by their distance to the query at full dimension."""
+        import numpy as np
+
+        blobs = self.vector_store.get(collection_name, ids)
+        if len(blobs) < len(ids):
+            # some candidates have no full-dimension copy, keep the index ranking
+            return candidates
+
+        vectors = decode(
+            [blobs[id_] for id_ in ids],
+            stored_precision(storage["rescore"], storage["scales"]),
+            storage["scales"],
+        )
+        query = np.asarray(query_embedding, dtype=np.float32)
+
+        # same distance functions as the index
+        if space == "cosine":
+            norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+            distances = 1 - vectors @ query / np.maximum(norms, 1e-12)
+        elif space == "ip":
+            distances = 1 - vectors @ query
+        else:
+            distances = ((vectors - query) ** 2).sum(axis=1)
+
+        rescored = [
+            (doc, meta, float(distance))
+            for (doc, meta, _), distance in zip(candidates, distances)
+        ]
+        rescored.sort(key=lambda x: x[2])
+        return rescored
@@ -0,0 +1,69 @@
+from abc import ABC, abstractmethod
+import asyncio
+
+
+class EmbeddingProvider(ABC):
+    """
+    Common interface for embedding providers.
+
+    Besides `get_embeddings`, every provider declares its capabilities so the
+    ingestion path can plan batching, rate limiting and concurrency per provider.
+    """
+
+    # identifier of the provider, as used in config.json
+    name: str = ""
+
+    # maximum number of inputs sent in a single request
+    max_batch_items: int = 32
+    # maximum number of tokens per input before the provider truncates it
+    max_tokens: int = 512
+    # size of the returned vectors (None if unknown until the model is loaded)
+    dimensions: int | None = None
+    # whether the returned vectors are already L2-normalized
+    normalized: bool = False
+    # local providers are compute bound, remote ones are network bound and rate limited
+    is_local: bool = True
+    # minimum delay between two requests in seconds
+    min_request_interval: float = 0.0
+    # maximum number of requests in flight at the same time
+    max_concurrency: int = 1
+    # whether `aget_embeddings` is natively asynchronous
+    supports_async: bool = False
+    # price in USD per million input tokens (None if unknown)
+    cost_per_million_tokens: float | None = 0.0
+
+    def __init__(self, model_name: str) -> None:
+        self.model_name = model_name
+
+    @abstractmethod
+    def get_embeddings(self, sentences: list[str] | str) -> list[list[float]]:
+        """
+        Get embeddings for a list of sentences.
+
+        Args:
+            sentences (list[str] | str): List of sentences to embed or a single sentence.
+
+        Returns:
+            list[list[float]]: List of embeddings for each sentence.
+        """
+        pass
+
+    async def aget_embeddings(self, sentences: list[str] | str) -> list[list[float]]:
+        """Asynchronous version of `get_embeddings` (runs in a worker thread by default)."""
+        return await asyncio.to_thread(self.get_embeddings, sentences)
+
+    def count_tokens(self, text: str) -> int:
+        """Tokenizer hook. Defaults to the usual ~4 characters per token estimate."""
+        return max(1, len(text) // 4)
+
+    def warm_up(self) -> None:
+        """Prepare the provider ahead of the first request. No-op by default."""
+        pass
+
+    @property
+    def host(self) -> str:
+        """Where the embeddings are computed."""
+        return "local"
+
+    def __call__(self, sentences: list[str] | str) -> list[list[float]]:
+        return self.get_embeddings(sentences)
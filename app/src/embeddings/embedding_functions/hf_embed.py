@@ -1,12 +1,28 @@
-from app.utils.constants import DEFAULT_PATHS
+from app.src.embeddings.embedding_functions.abstract_embedder import EmbeddingProvider
+from app.utils.constants import DEFAULT_PATHS, HF_PARITY_THRESHOLD, HF_BATCH_SIZE
 from app.src.core.ui import default_ui
 from app.src.helpers.valid_dir import validate_dir_name
-import os
+from app.utils.logger import logger
 from pathlib import Path
+import threading
+import os
 
 
 _DISPLAYED_DOWNLOADING_MESSAGE = False
 
+# "torch": fp32 eager PyTorch, "int8": dynamic int8 quantization of the Linear layers,
+# "onnx": ONNX Runtime on a graph exported once and cached next to the model weights
+HF_BACKENDS = ("torch", "int8", "onnx")
+
+# sentences used to compare an optimized backend against the fp32 model
+_PARITY_SAMPLE = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Embeddings map text to dense vectors for semantic search.",
+    "def add(a, b):\n    return a + b",
+    "Le modèle tourne sur le CPU sans carte graphique.",
+    "Quarterly revenue grew by 12% compared to the previous year.",
+]
+
 
 # configure embedding models path
 EMBEDDING_MODEL_PATH = ""
@@ -26,19 +42,47 @@ if not EMBEDDING_MODEL_PATH:
         EMBEDDING_MODEL_PATH = Path(os.path.expanduser(EMBEDDING_MODEL_PATH))
 
 
-class HFEmbedder:
+class HFEmbedder(EmbeddingProvider):
+
+    name = "hf"
+    max_batch_items = 256
+    normalized = True
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = "torch",
+        num_threads: int = None,
+        parity_check: bool = True,
+        batch_size: int = HF_BATCH_SIZE,
+    ):
+        super().__init__(model_name)
+        self.backend = (backend or "torch").lower()
+        if self.backend not in HF_BACKENDS:
+            raise ValueError(
+                f"Unsupported Hugging Face backend: {backend}. Options are {', '.join(HF_BACKENDS)}."
+            )
+        self.num_threads = num_threads
+        self.parity_check = parity_check
+        self.batch_size = max(1, batch_size or HF_BATCH_SIZE)
 
-    def __init__(self, model_name: str):
-        self.model_name = model_name
+        # loaded lazily on the first call, then reused for every batch
+        self._tokenizer = None
+        self._model = None
+        self._quantized_model = None
+        self._onnx_session = None
+        self._onnx_input_names: list[str] = []
+        # the model may be warmed up in the background while the first query comes in
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._dimensions = None
+        self._max_tokens = None
 
     # Mean Pooling - Take attention mask into account for correct averaging
     @staticmethod
-    def _mean_pooling(model_output, attention_mask):
+    def _mean_pooling(token_embeddings, attention_mask):
         import torch
 
-        token_embeddings = model_output[
-            0
-        ]  # First element of model_output contains all token embeddings
         input_mask_expanded = (
             attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
         )
@@ -46,26 +90,26 @@ class HFEmbedder:
             input_mask_expanded.sum(1), min=1e-9
         )
 
-    def get_embeddings(self, sentences: list[str] | str) -> list[list[float]]:
-        """
-        Get embeddings for a list of sentences using a Hugging Face model.
-
-        Args:
-            sentences (list[str] | str): List of sentences to embed or a single sentence.
+    def _load(self) -> None:
+        """Load the tokenizer, the fp32 model and the selected inference backend once."""
+        with self._load_lock:
+            if not self._loaded:
+                self._load_unlocked()
+                self._loaded = True
 
-        Returns:
-            list[list[float]]: List of embeddings for each sentence.
-        """
+    def _load_unlocked(self) -> None:
         global _DISPLAYED_DOWNLOADING_MESSAGE
 
         from transformers import AutoTokenizer, AutoModel
-        import torch.nn.functional as F
         import torch
         import transformers.utils.logging as hf_logging
 
         hf_logging.set_verbosity_error()
         os.makedirs(EMBEDDING_MODEL_PATH, exist_ok=True)
 
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+
         if not _DISPLAYED_DOWNLOADING_MESSAGE and not EMBEDDING_MODEL_PATH.exists():
             with default_ui.console.status("Downloading embedding model..."):
                 tokenizer = AutoTokenizer.from_pretrained(
@@ -83,16 +127,249 @@ class HFEmbedder:
                 self.model_name, cache_dir=EMBEDDING_MODEL_PATH
             )
 
-        encoded_input = tokenizer(
+        model.eval()
+        self._tokenizer = tokenizer
+        self._model = model
+
+        if self.backend == "int8":
+            self._quantized_model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+        elif self.backend == "onnx":
+            self._load_onnx_session()
+
+        if self.backend != "torch":
+            if self.parity_check:
+                self.check_parity()
+            # the fp32 weights are only needed for export and the parity check
+            self._model = None
+
+    def _get_tokenizer(self):
+        """The model's tokenizer, loaded on its own when the model isn't needed yet."""
+        if self._tokenizer is None:
+            from transformers import AutoTokenizer
+
+            self._tokenizer = AutoTokenizer.from_pretrained(
+                self.model_name, cache_dir=EMBEDDING_MODEL_PATH
+            )
+        return self._tokenizer
+
+    def _load_config(self) -> None:
+        """Read the embedding size and token limit from the model's config, without its weights."""
+        if self._dimensions is not None:
+            return
+
+        from transformers import AutoConfig
+
+        config = AutoConfig.from_pretrained(self.model_name, cache_dir=EMBEDDING_MODEL_PATH)
+        tokenizer = self._get_tokenizer()
+        self._max_tokens = min(
+            tokenizer.model_max_length,
+            getattr(config, "max_position_embeddings", tokenizer.model_max_length),
+        )
+        self._dimensions = config.hidden_size
+
+    @property
+    def dimensions(self) -> int:
+        self._load_config()
+        return self._dimensions
+
+    @property
+    def max_tokens(self) -> int:
+        self._load_config()
+        return self._max_tokens
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens with the model's own tokenizer (the whole text, past the model's limit too)."""
+        # counting only needs the tokenizer, not the model
+        return len(self._get_tokenizer()(text, truncation=False, verbose=False)["input_ids"])
+
+    def _onnx_path(self) -> Path:
+        """Location of the cached ONNX graph for this model."""
+        return (
+            EMBEDDING_MODEL_PATH / "onnx" / self.model_name.replace("/", "--") / "model.onnx"
+        )
+
+    def _load_onnx_session(self) -> None:
+        """Export the model to ONNX on first use and open an ONNX Runtime session on it."""
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError(
+                "ONNX Runtime is not installed. Please run 'pip install onnxruntime' to use the 'onnx' backend."
+            )
+
+        onnx_path = self._onnx_path()
+        input_names = [
+            name
+            for name in self._tokenizer.model_input_names
+            if name in ("input_ids", "attention_mask", "token_type_ids")
+        ]
+
+        if not onnx_path.exists():
+            with default_ui.console.status("Exporting embedding model to ONNX..."):
+                self._export_onnx(onnx_path, input_names)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+
+        self._onnx_session = ort.InferenceSession(
+            str(onnx_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        graph_inputs = {i.name for i in self._onnx_session.get_inputs()}
+        self._onnx_input_names = [name for name in input_names if name in graph_inputs]
+
+    def _export_onnx(self, onnx_path: Path, input_names: list[str]) -> None:
+        """Export the fp32 model's token embeddings to an ONNX graph with dynamic shapes."""
+        import torch
+
+        # the exporter writes the graph with the onnx package
+        try:
+            import onnx
+        except ImportError:
+            raise ImportError(
+                "ONNX is not installed. Please run 'pip install onnx' to use the 'onnx' backend."
+            )
+
+        class _TokenEmbeddings(torch.nn.Module):
+            def __init__(self, model):
+                super().__init__()
+                self.model = model
+
+            def forward(self, *args):
+                return self.model(**dict(zip(input_names, args)))[0]
+
+        dummy = self._tokenizer(
+            _PARITY_SAMPLE[:2], padding=True, truncation=True, return_tensors="pt"
+        )
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        onnx_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = onnx_path.with_suffix(".onnx.tmp")
+
+        torch.onnx.export(
+            _TokenEmbeddings(self._model),
+            tuple(dummy[name] for name in input_names),
+            str(tmp_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=17,
+            dynamo=False,
+        )
+        # only expose the graph once it is complete so an interrupted export is redone
+        os.replace(tmp_path, onnx_path)
+        logger.info(f"Exported {self.model_name} to ONNX at {onnx_path}")
+
+    def _token_embeddings(self, encoded_input, backend: str = None):
+        """Run the selected backend and return the last hidden state as a torch tensor."""
+        import torch
+
+        backend = backend or self.backend
+
+        if backend == "onnx":
+            feeds = {name: encoded_input[name].numpy() for name in self._onnx_input_names}
+            return torch.from_numpy(self._onnx_session.run(None, feeds)[0])
+
+        model = self._quantized_model if backend == "int8" else self._model
+        with torch.inference_mode():
+            return model(**encoded_input)[0]
+
+    def _embed(self, sentences: list[str], backend: str = None):
+        """Tokenize, run and pool a batch of sentences into normalized embeddings."""
+        encoded_input = self._tokenizer(
             sentences, padding=True, truncation=True, return_tensors="pt"
         )
+        return self._embed_encoded(encoded_input, backend)
 
-        with torch.no_grad():
-            model_output = model(**encoded_input)
+    def _embed_encoded(self, encoded_input, backend: str = None):
+        """Run and pool an already padded batch into normalized embeddings."""
+        import torch.nn.functional as F
+
+        token_embeddings = self._token_embeddings(encoded_input, backend)
 
         sentence_embeddings = self._mean_pooling(
-            model_output, encoded_input["attention_mask"]
+            token_embeddings, encoded_input["attention_mask"]
+        )
+        return F.normalize(sentence_embeddings, p=2, dim=1)
+
+    def check_parity(self, sentences: list[str] = None) -> float:
+        """
+        Compare the active backend against the fp32 PyTorch model.
+
+        Args:
+            sentences (list[str]): Sentences to compare on. Defaults to a small built-in sample.
+
+        Returns:
+            float: The lowest cosine similarity between the two sets of embeddings.
+        """
+        if self._model is None:
+            raise RuntimeError("The fp32 model is required for the parity check.")
+
+        sentences = sentences or _PARITY_SAMPLE
+        reference = self._embed(sentences, backend="torch")
+        candidate = self._embed(sentences)
+
+        # both sides are L2-normalized so the row-wise dot product is the cosine similarity
+        min_similarity = float((reference * candidate).sum(dim=1).min())
+        logger.info(
+            f"HF embedder parity ({self.backend} vs fp32) for {self.model_name}: min cosine {min_similarity:.5f}"
         )
-        sentence_embeddings = F.normalize(sentence_embeddings, p=2, dim=1)
 
-        return sentence_embeddings.tolist()
+        if min_similarity < HF_PARITY_THRESHOLD:
+            default_ui.warning(
+                f"The '{self.backend}' embedding backend drifts from the fp32 model "
+                f"(min cosine similarity {min_similarity:.4f}). Retrieval quality may be affected."
+            )
+
+        return min_similarity
+
+    def warm_up(self) -> None:
+        """Load the model (and export or quantize it) ahead of the first real request."""
+        self._load()
+
+    def get_embeddings(self, sentences: list[str] | str) -> list[list[float]]:
+        """
+        Get embeddings for a list of sentences using a Hugging Face model.
+
+        Args:
+            sentences (list[str] | str): List of sentences to embed or a single sentence.
+
+        Returns:
+            list[list[float]]: List of embeddings for each sentence.
+        """
+        self._load()
+
+        if isinstance(sentences, str):
+            sentences = [sentences]
+
+        if not sentences:
+            return []
+
+        # tokenize without padding first so every sequence can be batched with
+        # others of a similar length instead of being padded to the longest one
+        encoded = self._tokenizer(sentences, truncation=True)
+        features = [
+            {key: encoded[key][i] for key in encoded.keys()}
+            for i in range(len(sentences))
+        ]
+        order = sorted(
+            range(len(sentences)), key=lambda i: len(features[i]["input_ids"])
+        )
+
+        embeddings: list[list[float]] = [None] * len(sentences)
+
+        for start in range(0, len(order), self.batch_size):
+            bucket = order[start : start + self.batch_size]
+            encoded_input = self._tokenizer.pad(
+                [features[i] for i in bucket], padding=True, return_tensors="pt"
+            )
+            # restore the caller's order
+            for i, vector in zip(bucket, self._embed_encoded(encoded_input).tolist()):
+                embeddings[i] = vector
+
+        return embeddings
@@ -0,0 +1,264 @@
+from app.src.embeddings.embedding_functions.abstract_embedder import EmbeddingProvider
+from app.src.embeddings.embedding_functions.hf_embed import HFEmbedder
+from app.utils.constants import HF_POOL_START_TIMEOUT, HF_POOL_TASK_TIMEOUT
+from app.utils.logger import logger
+import multiprocessing as mp
+import threading
+import queue
+import time
+import os
+
+
+def _worker(
+    model_name: str, options: dict, tasks: mp.Queue, results: mp.Queue
+) -> None:
+    """Worker process: hold one model and embed the batches it receives until told to stop."""
+    embedder = HFEmbedder(model_name, **options)
+
+    try:
+        embedder.warm_up()
+        results.put(("ready", None, None))
+    except Exception as e:
+        results.put(("ready", None, repr(e)))
+        return
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        task_id, sentences = task
+        try:
+            results.put((task_id, embedder.get_embeddings(sentences), None))
+        except Exception as e:
+            results.put((task_id, None, repr(e)))
+
+
+class HFEmbeddingPool(EmbeddingProvider):
+    """
+    Spread Hugging Face embedding batches over several worker processes.
+
+    Each worker holds its own copy of the model with a fixed number of
+    threads, so tokenization and inference scale across all CPU cores.
+    Results are returned in the order of the inputs. Several batches may be in
+    flight at once, they share the workers.
+
+    If a worker dies or stops answering, the pool is given up on and every
+    call (including the ones in flight) is embedded in-process instead.
+    """
+
+    name = "hf"
+    normalized = True
+
+    def __init__(
+        self, embedder: HFEmbedder, workers: int = None, threads_per_worker: int = None
+    ) -> None:
+        super().__init__(embedder.model_name)
+        cpu_count = os.cpu_count() or 1
+
+        self.embedder = embedder
+        self.workers = max(1, workers or cpu_count)
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.workers)
+
+        # enough work per call to keep every worker busy with a couple of batches
+        self.task_size = embedder.batch_size
+        self.max_batch_items = self.task_size * self.workers * 2
+        # the next batch of a document is dispatched while the previous one is collected
+        self.max_concurrency = 2
+
+        self._tasks = None
+        self._results = None
+        self._processes: list[mp.Process] = []
+
+        # batches in flight, by task id, completed by the collector thread
+        self._lock = threading.Lock()
+        self._pending: dict[int, dict] = {}
+        self._next_task = 0
+        self._collector: threading.Thread = None
+        self._stopped = threading.Event()
+        # why the pool was given up on, None while it works
+        self._failed: str = None
+        self._fallback_lock = threading.Lock()
+
+    @property
+    def host(self) -> str:
+        return f"local x{self.workers}"
+
+    @property
+    def dimensions(self) -> int:
+        return self.embedder.dimensions
+
+    @property
+    def max_tokens(self) -> int:
+        return self.embedder.max_tokens
+
+    def count_tokens(self, text: str) -> int:
+        return self.embedder.count_tokens(text)
+
+    def start(self) -> None:
+        """Start the worker processes and wait until every model is loaded."""
+        if self._processes:
+            return
+
+        ctx = mp.get_context("spawn")
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+
+        for index in range(self.workers):
+            options = {
+                "backend": self.embedder.backend,
+                "num_threads": self.threads_per_worker,
+                "batch_size": self.embedder.batch_size,
+                # drift is the same in every worker, checking it once is enough
+                "parity_check": self.embedder.parity_check and index == 0,
+            }
+            process = ctx.Process(
+                target=_worker,
+                args=(self.model_name, options, self._tasks, self._results),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+
+        errors = []
+        ready = 0
+        deadline = time.monotonic() + HF_POOL_START_TIMEOUT
+        while ready < self.workers:
+            try:
+                _, _, error = self._results.get(timeout=1)
+            except queue.Empty:
+                if time.monotonic() > deadline:
+                    errors.append("timed out waiting for the workers to load the model")
+                    break
+                if not all(process.is_alive() for process in self._processes):
+                    errors.append("a worker exited while loading the model")
+                    break
+                continue
+
+            ready += 1
+            if error:
+                errors.append(error)
+
+        if errors:
+            self.close()
+            raise RuntimeError(f"Failed to start embedding workers: {errors[0]}")
+
+        self._failed = None
+        self._stopped.clear()
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+        logger.info(
+            f"Started {self.workers} embedding workers with {self.threads_per_worker} threads each"
+        )
+
+    def _collect(self) -> None:
+        """Hand the results of the workers to the calls waiting for them, watching the workers meanwhile."""
+        while not self._stopped.is_set():
+            if not all(process.is_alive() for process in self._processes):
+                if not self._stopped.is_set():
+                    self._fail("an embedding worker exited")
+                return
+
+            try:
+                task_id, embeddings, error = self._results.get(timeout=1)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError) as e:
+                if not self._stopped.is_set():
+                    self._fail(f"lost the connection to the workers: {e}")
+                return
+
+            with self._lock:
+                task = self._pending.pop(task_id, None)
+            if task is not None:
+                task["result"] = (embeddings, error)
+                task["done"].set()
+
+    def _fail(self, reason: str) -> None:
+        """Give up on the workers, releasing every call waiting for them."""
+        with self._lock:
+            if self._failed is None:
+                self._failed = reason
+                logger.warning(f"Embedding pool failed ({reason}), embedding in-process")
+            pending, self._pending = list(self._pending.values()), {}
+
+        for task in pending:
+            task["done"].set()
+
+    def _embed_in_process(self, sentences: list[str]) -> list[list[float]]:
+        """Fallback once the pool failed: embed with the parent's model, one call at a time."""
+        with self._fallback_lock:
+            return self.embedder.get_embeddings(sentences)
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        self._stopped.set()
+        if self._collector is not None:
+            self._collector.join(timeout=5)
+            self._collector = None
+
+        for _ in self._processes:
+            self._tasks.put(None)
+
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+        self._processes = []
+
+    def __enter__(self) -> "HFEmbeddingPool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get_embeddings(self, sentences: list[str] | str) -> list[list[float]]:
+        """
+        Get embeddings for a list of sentences, spreading the work over the workers.
+
+        Args:
+            sentences (list[str] | str): List of sentences to embed or a single sentence.
+
+        Returns:
+            list[list[float]]: List of embeddings for each sentence, in input order.
+        """
+        if isinstance(sentences, str):
+            sentences = [sentences]
+
+        if not self._processes and self._failed is None:
+            self.start()
+
+        tasks = []
+        with self._lock:
+            if self._failed is None:
+                for start in range(0, len(sentences), self.task_size):
+                    task = {"done": threading.Event(), "result": None}
+                    self._pending[self._next_task] = task
+                    self._tasks.put((self._next_task, sentences[start : start + self.task_size]))
+                    self._next_task += 1
+                    tasks.append(task)
+
+        if self._failed is not None:
+            return self._embed_in_process(sentences)
+
+        parts: list[list[list[float]]] = []
+        errors = []
+        # wait for every result, even after a failure, so none leaks into the next call
+        for task in tasks:
+            if not task["done"].wait(HF_POOL_TASK_TIMEOUT):
+                self._fail("an embedding worker stopped answering")
+            if task["result"] is None:
+                return self._embed_in_process(sentences)
+
+            embeddings, error = task["result"]
+            if error:
+                errors.append(error)
+            parts.append(embeddings)
+
+        if errors:
+            raise RuntimeError(f"Embedding worker failed: {errors[0]}")
+
+        return [embedding for part in parts for embedding in part]
@@ -1,3 +1,4 @@
+from app.src.embeddings.embedding_functions.abstract_embedder import EmbeddingProvider
 import requests
 import os
 
@@ -7,11 +8,25 @@ MODEL_NAME = "paraphrase-multilingual-mpnet-base-v2"
 API_URL = f"https://api.nlpcloud.io/v1/{MODEL_NAME}/embeddings"
 
 
-class NLPCloudEmbedder:
+class NLPCloudEmbedder(EmbeddingProvider):
     """Class to get embeddings using the NLP Cloud API."""
 
+    name = "nlpcloud"
+    max_batch_items = 50
+    max_tokens = 128
+    dimensions = 768
+    is_local = False
+    min_request_interval = 1.0
+    # billed per plan rather than per token
+    cost_per_million_tokens = None
+
     def __init__(self, model_name=MODEL_NAME):
-        self.model_name = model_name
+        super().__init__(model_name)
+        self.session = requests.Session()
+
+    @property
+    def host(self) -> str:
+        return "api.nlpcloud.io"
 
     def get_embeddings(self, sentences: list[str] | str) -> list[list[float]]:
         """
@@ -31,6 +46,6 @@ class NLPCloudEmbedder:
             sentences = [sentences]
         payload = {"sentences": sentences}
 
-        response = requests.post(API_URL, json=payload, headers=headers)
+        response = self.session.post(API_URL, json=payload, headers=headers)
         response.raise_for_status()
         return response.json()["embeddings"]
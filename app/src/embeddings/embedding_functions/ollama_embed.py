@@ -1,12 +1,59 @@
+from app.src.embeddings.embedding_functions.abstract_embedder import EmbeddingProvider
+from app.utils.constants import OLLAMA_KEEP_ALIVE
+from urllib.parse import urlparse
 import ollama
+import os
 
 
-class OllamaEmbedder:
+OLLAMA_DEFAULT_HOST = "http://127.0.0.1:11434"
+
+
+class OllamaEmbedder(EmbeddingProvider):
     """Class to get embeddings using the Ollama API."""
-    
-    def __init__(self, model_name: str = "all-minilm") -> None:
-        self.model_name = model_name
-    
+
+    name = "ollama"
+    max_batch_items = 64
+    max_tokens = 512
+    normalized = True
+    supports_async = True
+
+    def __init__(
+        self,
+        model_name: str = "all-minilm",
+        host: str = None,
+        keep_alive: str | int = OLLAMA_KEEP_ALIVE,
+        truncate: bool = True,
+        num_thread: int = None,
+        options: dict = None,
+    ) -> None:
+        super().__init__(model_name)
+        self.keep_alive = keep_alive
+        self.truncate = truncate
+
+        self.options = dict(options or {})
+        if num_thread:
+            self.options["num_thread"] = num_thread
+
+        self._host = host or os.getenv("OLLAMA_HOST") or OLLAMA_DEFAULT_HOST
+        if "://" not in self._host:
+            self._host = f"http://{self._host}"
+
+        # a single client keeps the HTTP connection alive across batches and turns
+        self.client = ollama.Client(host=self._host)
+        self.async_client = None
+
+        # a remote Ollama server is network bound: keep a few requests in flight
+        self.is_local = urlparse(self._host).hostname in ("localhost", "127.0.0.1", "::1", "0.0.0.0")
+        self.max_concurrency = 1 if self.is_local else 4
+
+    @property
+    def host(self) -> str:
+        return self._host
+
+    def warm_up(self) -> None:
+        """Load the model into memory ahead of the first real request."""
+        self.get_embeddings(["warm up"])
+
     def get_embeddings(self, sentences: list[str] | str) -> list[list[float]]:  # 384
         """
         Get embeddings for a list of sentences using the Ollama API.
@@ -17,5 +64,25 @@ class OllamaEmbedder:
         Returns:
             list[list[float]]: List of embeddings for each sentence.
         """
-        response = ollama.embed(model=self.model_name, input=sentences)
+        response = self.client.embed(
+            model=self.model_name,
+            input=sentences,
+            truncate=self.truncate,
+            options=self.options or None,
+            keep_alive=self.keep_alive,
+        )
+        return response.embeddings
+
+    async def aget_embeddings(self, sentences: list[str] | str) -> list[list[float]]:
+        """Asynchronous version of `get_embeddings` using Ollama's async client."""
+        if self.async_client is None:
+            self.async_client = ollama.AsyncClient(host=self.host)
+
+        response = await self.async_client.embed(
+            model=self.model_name,
+            input=sentences,
+            truncate=self.truncate,
+            options=self.options or None,
+            keep_alive=self.keep_alive,
+        )
         return response.embeddings
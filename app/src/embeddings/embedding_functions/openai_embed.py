@@ -1,17 +1,61 @@
-from openai import OpenAI
+from app.src.embeddings.embedding_functions.abstract_embedder import EmbeddingProvider
+from openai import OpenAI, AsyncOpenAI
 import os
 
 
-class OpenAIEmbedder:
+OPENAI_EMBEDDING_DIMENSIONS = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+
+# USD per million input tokens
+OPENAI_EMBEDDING_PRICES = {
+    "text-embedding-ada-002": 0.10,
+    "text-embedding-3-small": 0.02,
+    "text-embedding-3-large": 0.13,
+}
+
+
+class OpenAIEmbedder(EmbeddingProvider):
     """Class to get embeddings using the OpenAI API."""
-    
+
+    name = "openai"
+    max_batch_items = 2048
+    max_tokens = 8191
+    normalized = True
+    is_local = False
+    min_request_interval = 0.2
+    max_concurrency = 4
+    supports_async = True
+
     def __init__(self, model_name: str = "text-embedding-ada-002") -> None:
-        self.model_name = model_name
+        super().__init__(model_name)
         self.client = None
-    
+        self.async_client = None
+        self.dimensions = OPENAI_EMBEDDING_DIMENSIONS.get(model_name)
+        self.cost_per_million_tokens = OPENAI_EMBEDDING_PRICES.get(model_name)
+        self._encoding = None
+
+    @property
+    def host(self) -> str:
+        return "api.openai.com"
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens with tiktoken when it is installed."""
+        if self._encoding is None:
+            try:
+                import tiktoken
+
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                return super().count_tokens(text)
+
+        return len(self._encoding.encode(text))
+
     def get_embeddings(self, sentences: list[str] | str) -> list[list[float]]:
         """
-        Get embeddings for a list of sentences using the Ollama API.
+        Get embeddings for a list of sentences using the OpenAI API.
 
         Args:
             sentences (list[str] | str): List of sentences to embed.
@@ -24,11 +68,25 @@ class OpenAIEmbedder:
 
         if isinstance(sentences, str):
             sentences = [sentences]
-        
+
         response = self.client.embeddings.create(
             model=self.model_name,
             input=sentences
         )
-        
-        embeddings = [data['embedding'] for data in response['data']]
+
+        embeddings = [data.embedding for data in response.data]
         return embeddings
+
+    async def aget_embeddings(self, sentences: list[str] | str) -> list[list[float]]:
+        """Asynchronous version of `get_embeddings` using OpenAI's async client."""
+        if self.async_client is None:
+            self.async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+        if isinstance(sentences, str):
+            sentences = [sentences]
+
+        response = await self.async_client.embeddings.create(
+            model=self.model_name,
+            input=sentences
+        )
+        return [data.embedding for data in response.data]
@@ -0,0 +1,60 @@
+from datetime import datetime
+from fnmatch import fnmatchcase
+import os
+
+
+# keys accepted by `/start_rag --where`
+FILTER_KEYS = ("path", "type", "since")
+
+
+def parse_filters(args: list[str]) -> dict:
+    """
+    Parse `key=value` retrieval filters, e.g. `path=docs/** type=pdf,md since=2026-01-01`.
+
+    Returns:
+        dict: {"path": [glob patterns], "type": [extensions], "since": timestamp}, with only the given keys.
+
+    Raises:
+        ValueError: With the offending argument, if it can't be parsed.
+    """
+    filters = {}
+    for arg in args:
+        key, sep, value = arg.partition("=")
+        key = key.strip().lower()
+        if not sep or not value or key not in FILTER_KEYS:
+            raise ValueError(arg)
+
+        if key == "since":
+            try:
+                filters["since"] = datetime.fromisoformat(value).timestamp()
+            except ValueError:
+                raise ValueError(arg)
+        elif key == "type":
+            filters.setdefault("type", []).extend(
+                ext.lower().lstrip(".") for ext in value.split(",") if ext
+            )
+        else:
+            filters.setdefault("path", []).extend(p for p in value.split(",") if p)
+
+    return filters
+
+
+def normalize_path(path: str) -> str:
+    """A path or pattern with `/` separators, case-folded where paths are case-insensitive (Windows)."""
+    path = path.replace("\\", "/")
+    return path.lower() if os.name == "nt" else path
+
+
+def match_path(path: str, patterns: list[str]) -> bool:
+    """
+    Whether a stored path matches any glob pattern, either entirely or from a
+    directory (or archive) boundary on, so `docs/**` matches `/repo/docs/a.md`
+    and `/drops/site.zip!docs/a.md`. Native and posix separators are equivalent.
+    """
+    path = normalize_path(path)
+    return any(
+        fnmatchcase(path, pattern)
+        or fnmatchcase(path, f"*/{pattern}")
+        or fnmatchcase(path, f"*!{pattern}")
+        for pattern in map(normalize_path, patterns)
+    )
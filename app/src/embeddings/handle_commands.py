@@ -1,9 +1,192 @@
-from app.src.embeddings.db_client import DataBaseClient
+from app.src.embeddings.db_client import DataBaseClient, INDEX_SPACES
+from app.src.embeddings.vector_storage import RESCORE_PRECISIONS
+from app.src.embeddings.rag_errors import DBAccessError
 from app.src.core.ui import default_ui
 from app.utils.ui_messages import UI_MESSAGES
+from app.utils.logger import logger
+import threading
 import os
 
 
+# options that don't take a value
+_BOOLEAN_OPTIONS = {"--calibrate", "--dry-run"}
+
+# the `/compact` running in the background, if any
+_compaction: threading.Thread = None
+
+
+def _parse_options(args: tuple[str, ...]) -> tuple[list[str], dict[str, str | bool]]:
+    """Split command arguments into positional arguments and `--option [value]` pairs."""
+    positional = []
+    options = {}
+
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg.startswith("--"):
+            name = arg[2:].lower()
+            if f"--{name}" in _BOOLEAN_OPTIONS or i + 1 >= len(args):
+                options[name] = True
+            else:
+                options[name] = args[i + 1]
+                i += 1
+        else:
+            positional.append(arg)
+        i += 1
+
+    return positional, options
+
+
+def _int_option(options: dict, name: str) -> int | None:
+    """Read a positive integer option. Raises ValueError on invalid values."""
+    if name not in options:
+        return None
+
+    value = options[name]
+    if isinstance(value, bool):
+        raise ValueError(name)
+
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(name)
+
+    if value < 1:
+        raise ValueError(name)
+    return value
+
+
+def _format_size(size: float) -> str:
+    """Format a byte count in human-readable form."""
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def _format_estimate(estimate: dict) -> str:
+    """Format the result of `DataBaseClient.estimate_ingestion` for display."""
+    messages = UI_MESSAGES["estimate"]
+    lines = [
+        messages["files"].format(
+            estimate["files"], _format_size(estimate["bytes"])
+        ),
+        messages["changed"].format(
+            estimate["changed_files"],
+            _format_size(estimate["changed_bytes"]),
+            estimate["unchanged_files"],
+        ),
+        messages["chunks"].format(estimate["chunks"], estimate["tokens"]),
+    ]
+
+    if estimate["linked_files"]:
+        lines.append(messages["linked"].format(estimate["linked_files"]))
+
+    if estimate["failed_files"]:
+        lines.append(messages["failed"].format(estimate["failed_files"]))
+
+    if estimate["seconds"] is None:
+        lines.append(messages["time_unknown"])
+    else:
+        lines.append(messages["time"].format(default_ui._format_duration(estimate["seconds"])))
+
+    if estimate["cost"] is None:
+        lines.append(messages["cost_unknown"])
+    else:
+        lines.append(messages["cost"].format(estimate["cost"]))
+
+    return "\n".join(lines)
+
+
+def _format_stats(stats: dict) -> str:
+    """Format the result of `DataBaseClient.collection_stats` for display."""
+    messages = UI_MESSAGES["stats"]
+    lines = [
+        messages["status"].format("Indexed" if stats["indexed"] else "Unindexed"),
+        messages["content"].format(stats["chunks"], stats["documents"], stats["files"]),
+    ]
+
+    if stats["aliases"]:
+        lines.append(messages["aliases"].format(stats["aliases"]))
+
+    if stats["avg_chunk_chars"] is not None:
+        lines.append(messages["chunk_length"].format(stats["avg_chunk_chars"]))
+
+    if stats["model"]:
+        lines.append(
+            messages["model"].format(
+                stats["provider"], stats["model"], stats["dimensions"] or "?"
+            )
+        )
+
+    if stats["storage"]:
+        lines.append(
+            messages["storage"].format(
+                stats["storage"]["dims"] or stats["dimensions"] or "?",
+                stats["storage"]["rescore"] or "off",
+            )
+        )
+
+    if stats["index_params"]:
+        lines.append(
+            messages["index"].format(
+                ", ".join(f"{name}={value}" for name, value in stats["index_params"].items())
+            )
+        )
+
+    if stats["index_bytes"] is not None:
+        lines.append(
+            messages["size"].format(
+                _format_size(stats["index_bytes"]), _format_size(stats["chars"])
+            )
+        )
+
+    lines.append(messages["last_ingest"].format(stats["last_ingest"] or "never"))
+
+    if stats["queries"]:
+        lines.append(
+            messages["latency"].format(
+                *(default_ui._format_duration(stats[p]) for p in ("p50", "p95", "p99")),
+                stats["queries"],
+            )
+        )
+    else:
+        lines.append(messages["latency_unknown"])
+
+    return "\n".join(lines)
+
+
+def _format_compaction(report: dict) -> str:
+    """Format the result of `DataBaseClient.compact_collection` for display."""
+    messages = UI_MESSAGES["compaction"]
+    lines = [
+        messages["cleanup"].format(
+            report["missing_files"], report["orphaned_chunks"], report["chunks"]
+        )
+    ]
+
+    if report["bytes_before"] is not None and report["bytes_after"] is not None:
+        lines.append(
+            messages["size"].format(
+                _format_size(report["bytes_before"]), _format_size(report["bytes_after"])
+            )
+        )
+
+    if report["latency_before"] is not None and report["latency_after"] is not None:
+        lines.append(
+            messages["latency"].format(
+                report["probes"],
+                default_ui._format_duration(report["latency_before"]),
+                default_ui._format_duration(report["latency_after"]),
+            )
+        )
+    else:
+        lines.append(messages["latency_unknown"])
+
+    return "\n".join(lines)
+
+
 def handle_embed_request(*args):
     """Handle the /embed command to embed documents from a specified directory."""
     db_client = DataBaseClient.get_instance()
@@ -14,6 +197,34 @@ def handle_embed_request(*args):
         )
         return
 
+    args, options = _parse_options(args)
+
+    try:
+        workers = _int_option(options, "workers")
+        dims = _int_option(options, "dims")
+        index_params = {
+            name.replace("-", "_"): _int_option(options, name)
+            for name in ("m", "ef-construction", "ef-search")
+            if name in options
+        }
+    except ValueError as e:
+        default_ui.error(UI_MESSAGES["errors"]["invalid_option_value"].format(e))
+        return
+
+    # `--rescore` alone keeps float16 copies
+    rescore = options.get("rescore")
+    if rescore is True:
+        rescore = "float16"
+    if rescore is not None and rescore not in RESCORE_PRECISIONS:
+        default_ui.error(UI_MESSAGES["errors"]["invalid_option_value"].format("rescore"))
+        return
+
+    if "space" in options:
+        if options["space"] not in INDEX_SPACES:
+            default_ui.error(UI_MESSAGES["errors"]["invalid_option_value"].format("space"))
+            return
+        index_params["space"] = options["space"]
+
     if len(args) < 2:
         default_ui.error(UI_MESSAGES["usage"]["embed"])
         return
@@ -28,8 +239,27 @@ def handle_embed_request(*args):
     if directory_path == "." or directory_path == "./":
         directory_path = os.getcwd()
 
+    if options.get("dry-run"):
+        with default_ui.console.status("Estimating ingestion..."):
+            estimate = db_client.estimate_ingestion(directory_path, collection_name)
+        if estimate is not None:
+            default_ui.status_message(
+                title=UI_MESSAGES["titles"]["ingestion_estimate"],
+                message=_format_estimate(estimate),
+                style="primary",
+            )
+        return
+
     with default_ui.console.status("Embedding documents..."):
-        db_client.store_documents(directory_path, collection_name)
+        db_client.store_documents(
+            directory_path,
+            collection_name,
+            workers=workers,
+            calibrate=bool(options.get("calibrate")),
+            dims=dims,
+            rescore=rescore,
+            index_params=index_params,
+        )
 
 
 def handle_index_request(*args):
@@ -96,6 +326,105 @@ def handle_list_command(*args):
     db_client.list_collections()
 
 
+def handle_stats_command(*args):
+    """Handle the /stats command, for one collection or all of them."""
+    db_client = DataBaseClient.get_instance()
+
+    if db_client is None:
+        default_ui.error(
+            UI_MESSAGES["errors"]["db_not_initialized"]
+        )
+        return
+
+    collection_names = [args[0]] if args else db_client.collection_names()
+    if not collection_names:
+        default_ui.status_message(
+            title=UI_MESSAGES["titles"]["collections"],
+            message="No collections found.",
+            style="success",
+        )
+        return
+
+    for collection_name in collection_names:
+        stats = db_client.collection_stats(collection_name)
+        if stats is None:
+            default_ui.error(UI_MESSAGES["errors"]["collection_not_exist"])
+            continue
+
+        default_ui.status_message(
+            title=UI_MESSAGES["titles"]["collection_stats"].format(collection_name),
+            message="\n" + _format_stats(stats),
+            style="primary",
+        )
+
+
+def handle_compact_command(*args):
+    """
+    Handle the /compact command: garbage-collect and rebuild one collection, or all of
+    them and the space left behind by deleted ones. It runs in the background so the
+    chat (and its RAG queries) can go on, and reports each result as it completes.
+    """
+    global _compaction
+
+    db_client = DataBaseClient.get_instance()
+
+    if db_client is None:
+        default_ui.error(
+            UI_MESSAGES["errors"]["db_not_initialized"]
+        )
+        return
+
+    if _compaction is not None and _compaction.is_alive():
+        default_ui.warning(UI_MESSAGES["warnings"]["compaction_running"])
+        return
+
+    collection_names = db_client.collection_names()
+    if args:
+        if args[0] not in collection_names:
+            default_ui.error(UI_MESSAGES["errors"]["collection_not_exist"])
+            return
+        collection_names = [args[0]]
+
+    def compact():
+        # a spinner would clash with the ones of the chat, results are printed as they come
+        try:
+            for collection_name in collection_names:
+                report = db_client.compact_collection(collection_name)
+                if report is None:
+                    continue
+                default_ui.status_message(
+                    title=UI_MESSAGES["titles"]["collection_compacted"].format(collection_name),
+                    message="\n" + _format_compaction(report),
+                    style="success",
+                )
+
+            if not args:
+                reclaimed = db_client.compact_database()
+                default_ui.status_message(
+                    title=UI_MESSAGES["titles"]["compaction"],
+                    message=UI_MESSAGES["success"]["database_compacted"].format(
+                        _format_size(reclaimed)
+                    ),
+                    style="success",
+                )
+
+        except DBAccessError:
+            default_ui.error(UI_MESSAGES["errors"]["db_access_error"])
+
+        except Exception:
+            logger.exception("Compaction failed")
+            default_ui.error(UI_MESSAGES["errors"]["command_failed"])
+
+    _compaction = threading.Thread(target=compact, daemon=True)
+    _compaction.start()
+    default_ui.status_message(
+        title=UI_MESSAGES["titles"]["compaction"],
+        message=UI_MESSAGES["messages"]["compaction_started"].format(
+            ", ".join(collection_names) or "the database"
+        ),
+    )
+
+
 def handle_delete_command(*args):
     """Handles the deletion of a collection from the database by its name."""
     db_client = DataBaseClient.get_instance()
@@ -115,6 +444,45 @@ def handle_delete_command(*args):
     db_client.delete_collection(collection_name=collection_name)
     
 
+def handle_export_command(*args):
+    """Handle the /export command to write a collection to a portable bundle."""
+    db_client = DataBaseClient.get_instance()
+
+    if db_client is None:
+        default_ui.error(
+            UI_MESSAGES["errors"]["db_not_initialized"]
+        )
+        return
+
+    if len(args) < 2:
+        default_ui.error(UI_MESSAGES["usage"]["export"])
+        return
+
+    with default_ui.console.status("Exporting collection..."):
+        db_client.export_collection(args[0], args[1])
+
+
+def handle_import_command(*args):
+    """Handle the /import command to load a bundle created with /export."""
+    db_client = DataBaseClient.get_instance()
+
+    if db_client is None:
+        default_ui.error(
+            UI_MESSAGES["errors"]["db_not_initialized"]
+        )
+        return
+
+    if len(args) < 1:
+        default_ui.error(UI_MESSAGES["usage"]["import"])
+        return
+
+    if len(args) > 1 and len(args[1]) < 3:
+        default_ui.error(UI_MESSAGES["errors"]["collection_name_too_short"])
+        return
+
+    db_client.import_collection(args[0], args[1] if len(args) > 1 else None)
+
+
 def handle_purge_command():
     """Handles the purging of all collections from the database."""
     db_client = DataBaseClient.get_instance()
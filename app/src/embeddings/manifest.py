@@ -0,0 +1,759 @@
+from pathlib import Path
+from datetime import datetime
+import threading
+import sqlite3
+import json
+
+
+class IngestionManifest:
+    """
+    Record of what has been ingested into each collection, kept in SQLite next to the database.
+
+    Lets the ingestion path tell unchanged files apart from a `stat` call
+    instead of hashing them and querying the vector store.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        # the connection is shared with background threads
+        self._lock = threading.RLock()
+        self._create_tables()
+
+    def _create_tables(self) -> None:
+        with self._lock, self.conn:
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS files (
+                    collection TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    chunks INTEGER NOT NULL,
+                    chars INTEGER NOT NULL,
+                    ingested_at TEXT NOT NULL,
+                    PRIMARY KEY (collection, file_path)
+                );
+                CREATE INDEX IF NOT EXISTS files_hash ON files (hash);
+                CREATE TABLE IF NOT EXISTS documents (
+                    collection TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    chunks INTEGER NOT NULL,
+                    chars INTEGER NOT NULL,
+                    PRIMARY KEY (collection, hash)
+                );
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    collection TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    chunks_done INTEGER NOT NULL,
+                    total_chunks INTEGER NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (collection, file_path)
+                );
+                CREATE TABLE IF NOT EXISTS collections (
+                    name TEXT PRIMARY KEY,
+                    provider TEXT,
+                    model TEXT,
+                    dimensions INTEGER,
+                    last_ingest TEXT
+                );
+                CREATE TABLE IF NOT EXISTS storage (
+                    collection TEXT PRIMARY KEY,
+                    dims INTEGER,
+                    rescore TEXT,
+                    scales TEXT
+                );
+                CREATE TABLE IF NOT EXISTS summaries (
+                    collection TEXT PRIMARY KEY,
+                    centroids BLOB NOT NULL,
+                    counts TEXT NOT NULL,
+                    dims INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS generations (
+                    collection TEXT PRIMARY KEY,
+                    generation INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS query_latency (
+                    collection TEXT NOT NULL,
+                    seconds REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS query_latency_collection ON query_latency (collection);
+                CREATE TABLE IF NOT EXISTS sections (
+                    hash TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    content TEXT NOT NULL,
+                    PRIMARY KEY (hash, idx)
+                );
+                CREATE TABLE IF NOT EXISTS minhash (
+                    collection TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    signature BLOB NOT NULL,
+                    PRIMARY KEY (collection, chunk_id)
+                );
+                CREATE TABLE IF NOT EXISTS minhash_bands (
+                    collection TEXT NOT NULL,
+                    band_key TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS minhash_bands_key ON minhash_bands (collection, band_key);
+                CREATE TABLE IF NOT EXISTS aliases (
+                    collection TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    canonical_id TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    metadata TEXT NOT NULL,
+                    PRIMARY KEY (collection, chunk_id)
+                );
+                CREATE INDEX IF NOT EXISTS aliases_canonical ON aliases (collection, canonical_id);
+                CREATE TABLE IF NOT EXISTS git_commits (
+                    collection TEXT NOT NULL,
+                    directory TEXT NOT NULL,
+                    commit_hash TEXT NOT NULL,
+                    PRIMARY KEY (collection, directory)
+                );
+                CREATE TABLE IF NOT EXISTS git_uncommitted (
+                    collection TEXT NOT NULL,
+                    directory TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    PRIMARY KEY (collection, directory, file_path)
+                );
+                CREATE TABLE IF NOT EXISTS memories (
+                    collection TEXT PRIMARY KEY
+                );
+                CREATE TABLE IF NOT EXISTS compactions (
+                    collection TEXT PRIMARY KEY,
+                    staging TEXT NOT NULL,
+                    retired TEXT NOT NULL
+                );
+                """
+            )
+
+    def get_file(self, collection_name: str, file_path: str) -> dict | None:
+        """Return the manifest entry of a file, if it was ingested."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM files WHERE collection = ? AND file_path = ?",
+                (collection_name, file_path),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def is_unchanged(
+        self, collection_name: str, file_path: str, size: int, mtime: float
+    ) -> bool:
+        """Whether the file was ingested with the same size and modification time."""
+        entry = self.get_file(collection_name, file_path)
+        return bool(entry) and entry["size"] == size and entry["mtime"] == mtime
+
+    def record_file(
+        self,
+        collection_name: str,
+        file_path: str,
+        file_hash: str,
+        size: int,
+        mtime: float,
+        chunks: int,
+        chars: int,
+    ) -> None:
+        """Record a fully ingested file (and its document) and drop its checkpoint."""
+        now = datetime.now().isoformat()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (collection_name, file_path, file_hash, size, mtime, chunks, chars, now),
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)",
+                (collection_name, file_hash, chunks, chars),
+            )
+            self.conn.execute(
+                "DELETE FROM checkpoints WHERE collection = ? AND file_path = ?",
+                (collection_name, file_path),
+            )
+            self.conn.execute(
+                "INSERT INTO collections (name, last_ingest) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET last_ingest = excluded.last_ingest",
+                (collection_name, now),
+            )
+            self._bump_generation(collection_name)
+
+    def get_checkpoint(self, collection_name: str, file_path: str) -> dict | None:
+        """Return the progress of a partly ingested file, if any."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM checkpoints WHERE collection = ? AND file_path = ?",
+                (collection_name, file_path),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def save_checkpoint(
+        self,
+        collection_name: str,
+        file_path: str,
+        file_hash: str,
+        chunks_done: int,
+        total_chunks: int,
+    ) -> None:
+        """Record that the first `chunks_done` chunks of a file are committed to the collection."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    collection_name,
+                    file_path,
+                    file_hash,
+                    chunks_done,
+                    total_chunks,
+                    datetime.now().isoformat(),
+                ),
+            )
+            self._bump_generation(collection_name)
+
+    def remove_file(self, collection_name: str, file_path: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM files WHERE collection = ? AND file_path = ?",
+                (collection_name, file_path),
+            )
+            self._bump_generation(collection_name)
+
+    def get_document(self, collection_name: str, file_hash: str) -> dict | None:
+        """Return the document with this content hash if it's stored in the collection."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM documents WHERE collection = ? AND hash = ?",
+                (collection_name, file_hash),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def remove_document(self, collection_name: str, file_hash: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM documents WHERE collection = ? AND hash = ?",
+                (collection_name, file_hash),
+            )
+            self.conn.execute(
+                "DELETE FROM sections WHERE hash = ? AND hash NOT IN (SELECT hash FROM documents)",
+                (file_hash,),
+            )
+            self._bump_generation(collection_name)
+
+    def find_document(self, file_hash: str, provider: str, model: str) -> str | None:
+        """Name of a collection holding this document embedded with the given model, if any."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT d.collection FROM documents d JOIN collections c ON c.name = d.collection "
+                "WHERE d.hash = ? AND c.provider = ? AND c.model = ? LIMIT 1",
+                (file_hash, provider, model),
+            ).fetchone()
+        return row["collection"] if row else None
+
+    def paths_for_hash(self, file_hash: str, collection_names: list[str] = None) -> list[str]:
+        """Every path with this content, optionally limited to some collections."""
+        query = "SELECT DISTINCT file_path FROM files WHERE hash = ?"
+        params = [file_hash]
+        if collection_names is not None:
+            query += f" AND collection IN ({', '.join('?' * len(collection_names))})"
+            params.extend(collection_names)
+
+        with self._lock:
+            rows = self.conn.execute(query + " ORDER BY file_path", params).fetchall()
+        return [row["file_path"] for row in rows]
+
+    def checkpoint_hashes(self, collection_name: str) -> set[str]:
+        """Hashes of the partly ingested documents of a collection."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT hash FROM checkpoints WHERE collection = ?", (collection_name,)
+            ).fetchall()
+        return {row["hash"] for row in rows}
+
+    def files(self, collection_name: str) -> list[dict]:
+        """All ingested files of a collection."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM files WHERE collection = ?", (collection_name,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def set_embedder(
+        self, collection_name: str, provider: str, model: str, dimensions: int | None
+    ) -> None:
+        """Record which embedding model a collection is built with."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO collections (name, provider, model, dimensions) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET provider = excluded.provider, "
+                "model = excluded.model, dimensions = excluded.dimensions",
+                (collection_name, provider, model, dimensions),
+            )
+
+    def get_collection(self, collection_name: str) -> dict | None:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM collections WHERE name = ?", (collection_name,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def collection_totals(self, collection_name: str) -> dict:
+        """
+        Aggregated counts of a collection.
+
+        **format**: {"files": int, "documents": int, "chunks": int, "chars": int}
+        """
+        with self._lock:
+            files = self.conn.execute(
+                "SELECT COUNT(*) FROM files WHERE collection = ?", (collection_name,)
+            ).fetchone()[0]
+            documents = self.conn.execute(
+                "SELECT COUNT(*) AS documents, COALESCE(SUM(chunks), 0) AS chunks, "
+                "COALESCE(SUM(chars), 0) AS chars FROM documents WHERE collection = ?",
+                (collection_name,),
+            ).fetchone()
+        return {"files": files, **dict(documents)}
+
+    def documents(self, collection_name: str) -> list[dict]:
+        """All stored documents of a collection."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM documents WHERE collection = ?", (collection_name,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def record_latency(self, collection_name: str, seconds: float, keep: int) -> None:
+        """Record a query latency, keeping only the `keep` most recent ones of the collection."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO query_latency VALUES (?, ?)", (collection_name, seconds)
+            )
+            self.conn.execute(
+                "DELETE FROM query_latency WHERE collection = ? AND rowid NOT IN "
+                "(SELECT rowid FROM query_latency WHERE collection = ? ORDER BY rowid DESC LIMIT ?)",
+                (collection_name, collection_name, keep),
+            )
+
+    def latencies(self, collection_name: str) -> list[float]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT seconds FROM query_latency WHERE collection = ?", (collection_name,)
+            ).fetchall()
+        return [row["seconds"] for row in rows]
+
+    def get_storage(self, collection_name: str) -> dict | None:
+        """
+        Vector storage settings of a collection.
+
+        **format**: {"dims": int | None, "rescore": str | None, "scales": list[float] | None}
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT dims, rescore, scales FROM storage WHERE collection = ?",
+                (collection_name,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        storage = dict(row)
+        storage["scales"] = json.loads(storage["scales"]) if storage["scales"] else None
+        return storage
+
+    def set_storage(
+        self,
+        collection_name: str,
+        dims: int | None,
+        rescore: str | None,
+        scales: list[float] | None = None,
+    ) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO storage VALUES (?, ?, ?, ?)",
+                (collection_name, dims, rescore, json.dumps(scales) if scales else None),
+            )
+
+    def get_summary(self, collection_name: str) -> dict | None:
+        """
+        Routing summary of a collection (see `routing.update_centroids`).
+
+        **format**: {"centroids": bytes (float32, row-major), "counts": list[int], "dims": int}
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT centroids, counts, dims FROM summaries WHERE collection = ?",
+                (collection_name,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"centroids": row["centroids"], "counts": json.loads(row["counts"]), "dims": row["dims"]}
+
+    def set_summary(
+        self, collection_name: str, centroids: bytes, counts: list[int], dims: int
+    ) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?)",
+                (collection_name, centroids, json.dumps(counts), dims),
+            )
+
+    def set_sections(self, file_hash: str, sections: list[str]) -> None:
+        """
+        Store the parent sections of a document (see `sections.split_sections`). They
+        are kept once per content, for every collection holding it.
+        """
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM sections WHERE hash = ?", (file_hash,))
+            self.conn.executemany(
+                "INSERT INTO sections VALUES (?, ?, ?)",
+                [(file_hash, idx, content) for idx, content in enumerate(sections)],
+            )
+
+    def get_sections(self, keys: list[tuple[str, int]]) -> dict[tuple[str, int], str]:
+        """The text of the given (hash, index) sections (missing ones are left out)."""
+        if not keys:
+            return {}
+
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT hash, idx, content FROM sections WHERE (hash, idx) IN "
+                f"(VALUES {', '.join(['(?, ?)'] * len(keys))})",
+                [value for key in keys for value in key],
+            ).fetchall()
+        return {(row["hash"], row["idx"]): row["content"] for row in rows}
+
+    def sections(self, collection_name: str) -> list[dict]:
+        """Every section of the documents of a collection."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM sections WHERE hash IN "
+                "(SELECT hash FROM documents WHERE collection = ?)",
+                (collection_name,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def add_signatures(
+        self,
+        collection_name: str,
+        chunk_ids: list[str],
+        signatures: list[bytes],
+        band_keys: list[list[str]],
+    ) -> None:
+        """Register the MinHash signatures of stored chunks (see `minhash.signatures`)."""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO minhash VALUES (?, ?, ?)",
+                [(collection_name, id_, sig) for id_, sig in zip(chunk_ids, signatures)],
+            )
+            self.conn.executemany(
+                "INSERT INTO minhash_bands VALUES (?, ?, ?)",
+                [
+                    (collection_name, key, id_)
+                    for id_, keys in zip(chunk_ids, band_keys)
+                    for key in keys
+                ],
+            )
+
+    def minhash_candidates(self, collection_name: str, band_keys: list[str]) -> list[tuple[str, bytes]]:
+        """Stored chunks sharing an LSH band with a signature, and their signatures."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT m.chunk_id, m.signature FROM minhash_bands b JOIN minhash m "
+                "ON m.collection = b.collection AND m.chunk_id = b.chunk_id "
+                f"WHERE b.collection = ? AND b.band_key IN ({', '.join('?' * len(band_keys))})",
+                [collection_name, *band_keys],
+            ).fetchall()
+        return [(row["chunk_id"], row["signature"]) for row in rows]
+
+    def add_aliases(self, collection_name: str, aliases: list[tuple[str, str, str, dict]]) -> None:
+        """
+        Record chunks skipped as near-duplicates of a stored one, as
+        (chunk id, stored chunk id, content, metadata) rows.
+        """
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO aliases VALUES (?, ?, ?, ?, ?)",
+                [
+                    (collection_name, id_, canonical_id, content, json.dumps(metadata))
+                    for id_, canonical_id, content, metadata in aliases
+                ],
+            )
+
+    def has_aliases(self, collection_name: str, file_hash: str) -> bool:
+        """Whether some chunks of a document were skipped as near-duplicates."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM aliases WHERE collection = ? AND chunk_id LIKE ? LIMIT 1",
+                (collection_name, f"{file_hash}_%"),
+            ).fetchone()
+        return row is not None
+
+    def alias_count(self, collection_name: str) -> int:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) AS n FROM aliases WHERE collection = ?", (collection_name,)
+            ).fetchone()
+        return row["n"]
+
+    def remove_chunks(self, collection_name: str, file_hash: str) -> list[dict]:
+        """
+        Forget the signatures and aliases of a document's chunks.
+
+        Returns:
+            list[dict]: The aliases of other documents that pointed at its chunks
+                ({"chunk_id", "content", "metadata"}). They are forgotten too, their
+                chunks must be stored again.
+        """
+        pattern = f"{file_hash}_%"
+        with self._lock, self.conn:
+            orphans = self.conn.execute(
+                "SELECT chunk_id, content, metadata FROM aliases "
+                "WHERE collection = ? AND canonical_id LIKE ? AND chunk_id NOT LIKE ?",
+                (collection_name, pattern, pattern),
+            ).fetchall()
+            for table, column in (
+                ("minhash", "chunk_id"),
+                ("minhash_bands", "chunk_id"),
+                ("aliases", "chunk_id"),
+                ("aliases", "canonical_id"),
+            ):
+                self.conn.execute(
+                    f"DELETE FROM {table} WHERE collection = ? AND {column} LIKE ?",
+                    (collection_name, pattern),
+                )
+        return [
+            {"chunk_id": row["chunk_id"], "content": row["content"], "metadata": json.loads(row["metadata"])}
+            for row in orphans
+        ]
+
+    def aliases(self, collection_name: str) -> list[dict]:
+        """Every near-duplicate alias of a collection."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT chunk_id, canonical_id, content, metadata FROM aliases WHERE collection = ?",
+                (collection_name,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def _bump_generation(self, collection_name: str) -> None:
+        """Mark that a collection's content changed (call inside a transaction)."""
+        self.conn.execute(
+            "INSERT INTO generations VALUES (?, 1) "
+            "ON CONFLICT(collection) DO UPDATE SET generation = generation + 1",
+            (collection_name,),
+        )
+
+    def bump_generation(self, collection_name: str) -> None:
+        """Invalidate what was cached about a collection's content."""
+        with self._lock, self.conn:
+            self._bump_generation(collection_name)
+
+    def vacuum(self) -> None:
+        with self._lock:
+            self.conn.execute("VACUUM")
+
+    def generations(self, collection_names: list[str]) -> dict[str, int]:
+        """
+        Content generation of each collection: a counter bumped by every ingest or
+        delete, so anything derived from a collection can tell whether it is stale.
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT collection, generation FROM generations "
+                f"WHERE collection IN ({', '.join('?' * len(collection_names))})",
+                collection_names,
+            ).fetchall()
+        found = {row["collection"]: row["generation"] for row in rows}
+        return {name: found.get(name, 0) for name in collection_names}
+
+    def get_git_commit(self, collection_name: str, directory: str) -> str | None:
+        """The commit a git directory was at when it was last fully ingested into the collection."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT commit_hash FROM git_commits WHERE collection = ? AND directory = ?",
+                (collection_name, directory),
+            ).fetchone()
+        return row["commit_hash"] if row else None
+
+    def set_git_commit(
+        self,
+        collection_name: str,
+        directory: str,
+        commit_hash: str,
+        uncommitted: list[str] = (),
+    ) -> None:
+        """
+        Record the commit a git directory was ingested at, with the files (relative to
+        it) that were modified, deleted or untracked then: git can't report those later.
+        """
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO git_commits VALUES (?, ?, ?)",
+                (collection_name, directory, commit_hash),
+            )
+            self.conn.execute(
+                "DELETE FROM git_uncommitted WHERE collection = ? AND directory = ?",
+                (collection_name, directory),
+            )
+            self.conn.executemany(
+                "INSERT INTO git_uncommitted VALUES (?, ?, ?)",
+                [(collection_name, directory, path) for path in uncommitted],
+            )
+
+    def get_git_uncommitted(self, collection_name: str, directory: str) -> list[str]:
+        """The files that were uncommitted when the commit of a git directory was recorded."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT file_path FROM git_uncommitted WHERE collection = ? AND directory = ?",
+                (collection_name, directory),
+            ).fetchall()
+        return [row["file_path"] for row in rows]
+
+    def add_memory(self, collection_name: str) -> None:
+        """Record a collection as the memory of a conversation, rather than user content."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO memories VALUES (?)", (collection_name,)
+            )
+
+    def remove_memory(self, collection_name: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM memories WHERE collection = ?", (collection_name,))
+
+    def memory_collections(self) -> set[str]:
+        """The collections holding conversation memories."""
+        with self._lock:
+            rows = self.conn.execute("SELECT collection FROM memories").fetchall()
+        return {row["collection"] for row in rows}
+
+    def start_compaction(self, collection_name: str, staging: str, retired: str) -> None:
+        """
+        Record a compaction in progress: the collection its copy is built in, and the
+        name the original is moved to while they are swapped.
+        """
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO compactions VALUES (?, ?, ?)",
+                (collection_name, staging, retired),
+            )
+
+    def finish_compaction(self, collection_name: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM compactions WHERE collection = ?", (collection_name,))
+
+    def compactions(self) -> dict[str, dict]:
+        """The compactions in progress (or interrupted), by collection."""
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM compactions").fetchall()
+        return {row["collection"]: dict(row) for row in rows}
+
+    def export_collection(self, collection_name: str) -> dict:
+        """Every manifest row of a collection, as plain data (for `/export`)."""
+        return {
+            "collection": self.get_collection(collection_name),
+            "files": self.files(collection_name),
+            "documents": self.documents(collection_name),
+            "storage": self.get_storage(collection_name),
+            "sections": self.sections(collection_name),
+            "aliases": self.aliases(collection_name),
+        }
+
+    def import_collection(self, collection_name: str, data: dict) -> None:
+        """Replace the manifest rows of a collection with exported ones (for `/import`)."""
+        self.drop_collection(collection_name)
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        collection_name,
+                        row["file_path"],
+                        row["hash"],
+                        row["size"],
+                        row["mtime"],
+                        row["chunks"],
+                        row["chars"],
+                        row["ingested_at"],
+                    )
+                    for row in data.get("files", [])
+                ],
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)",
+                [
+                    (collection_name, row["hash"], row["chunks"], row["chars"])
+                    for row in data.get("documents", [])
+                ],
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sections VALUES (?, ?, ?)",
+                [(row["hash"], row["idx"], row["content"]) for row in data.get("sections", [])],
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO aliases VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        collection_name,
+                        row["chunk_id"],
+                        row["canonical_id"],
+                        row["content"],
+                        row["metadata"],
+                    )
+                    for row in data.get("aliases", [])
+                ],
+            )
+            info = data.get("collection") or {}
+            self.conn.execute(
+                "INSERT OR REPLACE INTO collections VALUES (?, ?, ?, ?, ?)",
+                (
+                    collection_name,
+                    info.get("provider"),
+                    info.get("model"),
+                    info.get("dimensions"),
+                    info.get("last_ingest"),
+                ),
+            )
+            self._bump_generation(collection_name)
+            storage = data.get("storage")
+            if storage:
+                self.set_storage(
+                    collection_name, storage["dims"], storage["rescore"], storage["scales"]
+                )
+
+    def drop_collection(self, collection_name: str) -> None:
+        """Forget everything recorded for a collection."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM files WHERE collection = ?", (collection_name,))
+            self.conn.execute("DELETE FROM documents WHERE collection = ?", (collection_name,))
+            self.conn.execute("DELETE FROM checkpoints WHERE collection = ?", (collection_name,))
+            self.conn.execute("DELETE FROM collections WHERE name = ?", (collection_name,))
+            self.conn.execute("DELETE FROM git_commits WHERE collection = ?", (collection_name,))
+            self.conn.execute("DELETE FROM git_uncommitted WHERE collection = ?", (collection_name,))
+            self.conn.execute("DELETE FROM query_latency WHERE collection = ?", (collection_name,))
+            self.conn.execute("DELETE FROM storage WHERE collection = ?", (collection_name,))
+            self.conn.execute("DELETE FROM summaries WHERE collection = ?", (collection_name,))
+            self.conn.execute("DELETE FROM minhash WHERE collection = ?", (collection_name,))
+            self.conn.execute("DELETE FROM minhash_bands WHERE collection = ?", (collection_name,))
+            self.conn.execute("DELETE FROM aliases WHERE collection = ?", (collection_name,))
+            self.conn.execute("DELETE FROM sections WHERE hash NOT IN (SELECT hash FROM documents)")
+            # generations outlive the collection, a new one with the same name must not reuse them
+            self._bump_generation(collection_name)
+
+    def reset(self) -> None:
+        """Forget every collection."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("DELETE FROM documents")
+            self.conn.execute("DELETE FROM checkpoints")
+            self.conn.execute("DELETE FROM collections")
+            self.conn.execute("DELETE FROM git_commits")
+            self.conn.execute("DELETE FROM git_uncommitted")
+            self.conn.execute("DELETE FROM query_latency")
+            self.conn.execute("DELETE FROM storage")
+            self.conn.execute("DELETE FROM summaries")
+            self.conn.execute("DELETE FROM sections")
+            self.conn.execute("DELETE FROM minhash")
+            self.conn.execute("DELETE FROM minhash_bands")
+            self.conn.execute("DELETE FROM aliases")
+            self.conn.execute("DELETE FROM memories")
+            self.conn.execute("DELETE FROM compactions")
+            self.conn.execute("UPDATE generations SET generation = generation + 1")
@@ -0,0 +1,64 @@
+import hashlib
+import zlib
+
+
+# a prime above 2**32, the universal hashes are (a * x + b) mod _PRIME
+_PRIME = (1 << 32) + 15
+# character shingle length
+_SHINGLE = 5
+
+
+def _permutations(num_perm: int) -> tuple["np.ndarray", "np.ndarray"]:
+    """Fixed hash parameters, so signatures stay comparable across runs."""
+    import numpy as np
+
+    params = [
+        int.from_bytes(hashlib.blake2b(f"minhash-{i}".encode(), digest_size=8).digest(), "big")
+        for i in range(2 * num_perm)
+    ]
+    # below 2**31, so a * x (x < 2**32) can't overflow 64 bits
+    params = np.asarray([p % (1 << 31) for p in params], dtype=np.uint64)
+    return np.maximum(params[:num_perm], 1), params[num_perm:]
+
+
+def signatures(texts: list[str], num_perm: int) -> "np.ndarray":
+    """
+    MinHash signatures of texts over their lowercased, whitespace-collapsed
+    character 5-grams.
+
+    Returns:
+        np.ndarray: One row of `num_perm` uint32 values per text.
+    """
+    import numpy as np
+
+    a, b = _permutations(num_perm)
+    rows = []
+    for text in texts:
+        text = " ".join(text.lower().split())
+        shingles = {text[i : i + _SHINGLE] for i in range(max(1, len(text) - _SHINGLE + 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        # every permutation of every shingle at once, then the minimum per permutation
+        permuted = (hashes[:, None] * a[None, :] + b[None, :]) % _PRIME
+        rows.append(permuted.min(axis=0))
+
+    if not rows:
+        return np.empty((0, num_perm), dtype=np.uint32)
+    return (np.stack(rows) & 0xFFFFFFFF).astype(np.uint32)
+
+
+def band_keys(signature: "np.ndarray", bands: int) -> list[str]:
+    """LSH keys of a signature: texts sharing any key are candidate near-duplicates."""
+    rows = len(signature) // bands
+    return [
+        f"{band}:{signature[band * rows : (band + 1) * rows].tobytes().hex()}"
+        for band in range(bands)
+    ]
+
+
+def similarity(first: "np.ndarray", second: "np.ndarray") -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float((first == second).mean())
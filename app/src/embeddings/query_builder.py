@@ -0,0 +1,30 @@
+from app.utils.constants import RAG_FOLLOW_UP_WORDS
+import re
+
+
+# markdown decorations that carry no meaning for retrieval
+_DECORATIONS = re.compile(r"```[\w+-]*|`|\*\*|^\s{0,3}(?:#{1,6}|>)\s", re.MULTILINE)
+
+
+def build_retrieval_query(user_input: str, previous_input: str = None) -> str:
+    """
+    Build the text used to search the knowledge base from what the user typed.
+
+    Works on the raw message (before any prompt suffix is appended), drops markdown
+    decorations and collapses whitespace. Short follow-ups ("and for windows?") are
+    prefixed with the previous message so they keep their subject.
+
+    Args:
+        user_input (str): The user's message, without injected suffixes.
+        previous_input (str): The user's previous message in the session, if any.
+
+    Returns:
+        str: The retrieval query.
+    """
+    query = " ".join(_DECORATIONS.sub(" ", user_input).split())
+
+    if previous_input and len(query.split()) < RAG_FOLLOW_UP_WORDS:
+        previous = " ".join(_DECORATIONS.sub(" ", previous_input).split())
+        query = f"{previous} {query}".strip()
+
+    return query
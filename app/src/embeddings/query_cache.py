@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from pathlib import Path
+import threading
+import sqlite3
+import json
+import time
+
+
+class QueryCache:
+    """
+    Cache of final retrieval results: an in-memory LRU, optionally backed by a
+    SQLite tier that survives restarts.
+
+    Keys must capture everything results depend on (see `DataBaseClient._cache_key`),
+    including the generation of every searched collection, so stale entries are
+    never hit; they just age out.
+    """
+
+    def __init__(self, max_entries: int, disk_path: Path = None, max_disk_entries: int = 0) -> None:
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._entries: OrderedDict[str, list] = OrderedDict()
+        self._lock = threading.RLock()
+
+        self.conn = None
+        if disk_path is not None and max_disk_entries > 0:
+            self.conn = sqlite3.connect(str(disk_path), check_same_thread=False)
+            with self._lock, self.conn:
+                self.conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS query_cache (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        used_at REAL NOT NULL
+                    )
+                    """
+                )
+
+    def get(self, key: str) -> list | None:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+            if self.conn is None:
+                return None
+
+            row = self.conn.execute(
+                "SELECT value FROM query_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE query_cache SET used_at = ? WHERE key = ?", (time.time(), key)
+                )
+            value = json.loads(row[0])
+            self._remember(key, value)
+            return value
+
+    def put(self, key: str, value: list) -> None:
+        with self._lock:
+            self._remember(key, value)
+
+            if self.conn is None:
+                return
+
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO query_cache VALUES (?, ?, ?)",
+                    (key, json.dumps(value), time.time()),
+                )
+                self.conn.execute(
+                    "DELETE FROM query_cache WHERE key NOT IN "
+                    "(SELECT key FROM query_cache ORDER BY used_at DESC LIMIT ?)",
+                    (self.max_disk_entries,),
+                )
+
+    def _remember(self, key: str, value: list) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget every cached result, and wipe the retrieved passages from the disk tier."""
+        with self._lock:
+            self._entries.clear()
+            if self.conn is not None:
+                with self.conn:
+                    self.conn.execute("DELETE FROM query_cache")
+                # deleted rows would otherwise linger in the file's free pages
+                self.conn.execute("VACUUM")
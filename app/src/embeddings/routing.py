@@ -0,0 +1,75 @@
+def _normalize(vectors: "np.ndarray") -> "np.ndarray":
+    import numpy as np
+
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def update_centroids(
+    centroids: "np.ndarray | None",
+    counts: "np.ndarray | None",
+    embeddings: list[list[float]],
+    k: int,
+) -> tuple["np.ndarray", "np.ndarray"]:
+    """
+    Fold a batch of vectors into the centroids with MacQueen's online k-means:
+    the first `k` vectors seed the centroids, every later vector moves its
+    nearest centroid towards it by 1 / (number of vectors assigned to it).
+
+    Returns:
+        tuple: The updated centroids (float32, one per row) and their counts.
+    """
+    import numpy as np
+
+    vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+
+    if centroids is None or len(centroids) == 0:
+        centroids = np.empty((0, vectors.shape[1]), dtype=np.float32)
+        counts = np.empty(0, dtype=np.int64)
+
+    centroids, counts = centroids.copy(), counts.copy()
+    for vector in vectors:
+        if len(centroids) < k:
+            centroids = np.vstack([centroids, vector])
+            counts = np.append(counts, 1)
+            continue
+
+        nearest = int(np.argmax(centroids @ vector))
+        counts[nearest] += 1
+        centroids[nearest] += (vector - centroids[nearest]) / counts[nearest]
+
+    return centroids, counts
+
+
+def route(
+    query_vectors: dict[str, list[float]],
+    summaries: dict[str, "np.ndarray"],
+    margin: float,
+) -> list[str]:
+    """
+    Pick the collections worth searching for a query.
+
+    Args:
+        query_vectors (dict): The query vector of each collection (in its index space).
+        summaries (dict): The centroids of each summarized collection.
+        margin (float): How much lower than the best collection's cosine similarity
+            a collection may score and still be searched.
+
+    Returns:
+        list[str]: The collections to search. Collections without a summary are always kept.
+    """
+    import numpy as np
+
+    scores = {}
+    for name, centroids in summaries.items():
+        query = _normalize(np.asarray([query_vectors[name]], dtype=np.float32))[0]
+        scores[name] = float((_normalize(centroids) @ query).max())
+
+    if not scores:
+        return list(query_vectors)
+
+    best = max(scores.values())
+    return [
+        name
+        for name in query_vectors
+        if name not in scores or scores[name] >= best - margin
+    ]
@@ -1,6 +1,7 @@
 from app.src.embeddings.rag_errors import ScrapingFailedError
-from charset_normalizer import from_path
+from charset_normalizer import from_path, from_bytes
 from abc import ABC, abstractmethod
+from typing import BinaryIO
 from pathlib import Path
 
 
@@ -28,6 +29,20 @@ class Scraper(ABC):
         """
         pass
 
+    @abstractmethod
+    def scrape_stream(self, stream: BinaryIO, path: str, mtime: float) -> dict:
+        """Scrape content from a file object, e.g. a member of an archive.
+
+        Args:
+            stream (BinaryIO): The binary content to scrape.
+            path (str): The path recorded in the metadata (its extension selects the format).
+            mtime (float): The modification time recorded in the metadata.
+
+        Returns:
+            dict: The scraped content and metadata, in the same format as `scrape`.
+        """
+        pass
+
     @staticmethod
     def get_hash(file_path: str | Path) -> str:
         """Generate SHA-256 hash of a file."""
@@ -39,6 +54,13 @@ class Scraper(ABC):
                 sha256_hash.update(chunk)
         return sha256_hash.hexdigest()
 
+    @staticmethod
+    def get_bytes_hash(data: bytes) -> str:
+        """Generate SHA-256 hash of in-memory content."""
+        import hashlib
+
+        return hashlib.sha256(data).hexdigest()
+
     @staticmethod
     def _read_json_file(file_path: str | Path) -> str:
         """Load and format JSON file with proper structure."""
@@ -124,3 +146,42 @@ class Scraper(ABC):
         
         except Exception as e:
             raise ScrapingFailedError(f"Failed to read file: {e}")
+
+    @staticmethod
+    def read_regular_bytes(data: bytes, name: str) -> str:
+        """Decode and format in-memory content based on the extension of `name`."""
+        import json
+        import yaml
+        import xml.etree.ElementTree as ET
+
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            match = from_bytes(data).best()
+            if match is None:
+                raise ScrapingFailedError(f"Could not detect the encoding of {name}")
+            return str(match)
+
+        name_lower = name.lower()
+
+        try:
+            if name_lower.endswith(".json"):
+                return json.dumps(json.loads(text), indent=2, ensure_ascii=False)
+
+            elif name_lower.endswith(".xml"):
+                # validate, but keep the source layout (no file to re-parse from)
+                ET.fromstring(text)
+                return text
+
+            elif name_lower.endswith((".yaml", ".yml")):
+                return yaml.dump(
+                    yaml.safe_load(text),
+                    default_flow_style=False,
+                    allow_unicode=True,
+                    sort_keys=False,
+                )
+
+        except (json.JSONDecodeError, ET.ParseError, yaml.YAMLError):
+            pass
+
+        return text
@@ -0,0 +1,103 @@
+from app.src.embeddings.rag_errors import ScrapingFailedError
+from typing import BinaryIO, Iterator
+from pathlib import Path
+import datetime
+import tarfile
+import os
+import zipfile
+
+
+ARCHIVE_SUFFIXES = (
+    ".zip",
+    ".tar",
+    ".tar.gz",
+    ".tgz",
+    ".tar.bz2",
+    ".tbz2",
+    ".tar.xz",
+    ".txz",
+)
+
+# separates the archive path from the member path: "docs.zip!guide/intro.md"
+ARCHIVE_SEPARATOR = "!"
+
+
+def is_archive(file_path: str | Path) -> bool:
+    """Whether the file is an archive whose members are ingested instead of the file itself."""
+    return str(file_path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def member_path(archive_path: str | Path, name: str) -> str:
+    """Virtual path of an archive member, as recorded in the metadata."""
+    return f"{Path(archive_path).as_posix()}{ARCHIVE_SEPARATOR}{name}"
+
+
+class ArchiveMember:
+    """
+    A regular file inside an archive.
+
+    `stream` is only readable while the archive iteration is positioned on
+    this member (tar archives are read front to back in a single pass).
+    """
+
+    def __init__(
+        self, archive_path: str | Path, name: str, size: int, mtime: float, stream: BinaryIO
+    ) -> None:
+        self.archive_path = str(archive_path)
+        self.name = name
+        self.size = size
+        self.mtime = mtime
+        self.stream = stream
+        self.path = member_path(archive_path, name)
+        self._data = None
+
+    def read(self) -> bytes:
+        """Read the member's content (once, it's cached for the hash and the scraper)."""
+        if self._data is None:
+            self._data = self.stream.read()
+        return self._data
+
+
+def iter_archive_members(archive_path: str | Path) -> Iterator[ArchiveMember]:
+    """
+    Yield the regular files of a zip or tar archive as streams, without extracting them.
+    Nested archives are skipped.
+    """
+    try:
+        if str(archive_path).lower().endswith(".zip"):
+            yield from _iter_zip_members(archive_path)
+        else:
+            yield from _iter_tar_members(archive_path)
+
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+        raise ScrapingFailedError(f"Failed to read archive: {e}")
+
+
+def _iter_zip_members(archive_path: str | Path) -> Iterator[ArchiveMember]:
+    with zipfile.ZipFile(archive_path) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or is_archive(info.filename):
+                continue
+
+            # zip stores local time with a 2 second resolution, and some tools write
+            # invalid dates (e.g. a zero month): those members take the archive's own time
+            try:
+                mtime = datetime.datetime(*info.date_time).timestamp()
+            except (ValueError, OverflowError):
+                mtime = os.path.getmtime(archive_path)
+            with archive.open(info) as stream:
+                yield ArchiveMember(archive_path, info.filename, info.file_size, mtime, stream)
+
+
+def _iter_tar_members(archive_path: str | Path) -> Iterator[ArchiveMember]:
+    # "r|*" reads the (possibly compressed) archive as a stream, without seeking back
+    with tarfile.open(archive_path, mode="r|*") as archive:
+        for info in archive:
+            if not info.isfile() or is_archive(info.name):
+                continue
+
+            stream = archive.extractfile(info)
+            if stream is None:
+                continue
+
+            yield ArchiveMember(archive_path, info.name, info.size, float(info.mtime), stream)
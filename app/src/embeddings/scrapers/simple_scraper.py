@@ -1,6 +1,8 @@
 from app.src.embeddings.scrapers.abstract_scraper import Scraper
 from app.src.embeddings.rag_errors import ScrapingFailedError
+from typing import BinaryIO
 from pathlib import Path
+import io
 
 # docx
 from docx import Document
@@ -50,15 +52,53 @@ class SimpleScraper(Scraper):
             },
         }
 
+    def scrape_stream(self, stream: BinaryIO, path: str, mtime: float) -> dict:
+        """Extract text and metadata from a file object (e.g. an archive member) without touching the disk."""
+
+        data = stream.read()
+        path_lower = path.lower()
+
+        if path_lower.endswith(".pdf"):
+            try:
+                import pymupdf
+
+                with pymupdf.open(stream=data, filetype="pdf") as doc:
+                    text = pymupdf4llm.to_markdown(doc).strip()
+            except Exception as e:
+                raise ScrapingFailedError(f"Failed to scrape PDF file: {e}")
+
+        elif path_lower.endswith(".docx"):
+            try:
+                text = self._extract_docx(io.BytesIO(data))
+            except Exception as e:
+                raise ScrapingFailedError(f"Failed to scrape DOCX file: {e}")
+
+        else:
+            try:
+                text = self.read_regular_bytes(data, path)
+            except Exception as e:
+                raise ScrapingFailedError(f"Failed to scrape file: {e}")
+
+        text = text.strip()
+
+        return {
+            "content": text,
+            "metadata": {
+                "file_path": path,
+                "mod_date": datetime.datetime.fromtimestamp(mtime).isoformat(),
+                "hash": self.get_bytes_hash(data),
+            },
+        }
+
     @staticmethod
     def _extract_pdf(file_path: str | Path) -> str:
         md = pymupdf4llm.to_markdown(file_path)
         return md.strip()
 
     @staticmethod
-    def _extract_docx(file_path: str | Path) -> str:
+    def _extract_docx(file_path: str | Path | BinaryIO) -> str:
         """Extract all text content from a DOCX file including headers, footers, and tables (as markdown)."""
-        doc = Document(str(file_path))
+        doc = Document(file_path if hasattr(file_path, "read") else str(file_path))
         output = []
 
         # Headers
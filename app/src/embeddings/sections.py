@@ -0,0 +1,51 @@
+from bisect import bisect_right
+import re
+
+
+# lines opening a new section: markdown headings, page breaks written by the PDF
+# scraper, and top-level definitions in code
+_SECTION_START = re.compile(
+    r"^(?:#{1,6}\s|-{3,}\s*$|(?:async\s+def|def|class|function|func|fn|pub\s+fn|public|private|protected)\b)",
+    re.MULTILINE,
+)
+_PARAGRAPH_END = re.compile(r"\n\s*\n")
+
+
+def split_sections(content: str, max_chars: int, min_chars: int) -> list[int]:
+    """
+    Split a document into the parent sections its chunks are returned with.
+
+    Sections start at headings, page breaks and top-level definitions. Sections
+    shorter than `min_chars` are merged into the next one, longer than `max_chars`
+    ones are split at paragraph ends (or hard, if a paragraph is longer still).
+
+    Returns:
+        list[int]: The start offset of each section, the first one being 0. Section
+            `i` spans `content[starts[i]:starts[i + 1]]`.
+    """
+    boundaries = sorted({0, *(m.start() for m in _SECTION_START.finditer(content))})
+    boundaries.append(len(content))
+
+    starts = []
+    for start, end in zip(boundaries, boundaries[1:]):
+        # merging with the previous section while it's too short to stand alone
+        if starts and start - starts[-1] < min_chars:
+            start = starts.pop()
+
+        while end - start > max_chars:
+            limit = start + max_chars
+            cut = max(
+                (m.end() for m in _PARAGRAPH_END.finditer(content, start + min_chars, limit)),
+                default=limit,
+            )
+            starts.append(start)
+            start = cut
+
+        starts.append(start)
+
+    return starts or [0]
+
+
+def section_of(starts: list[int], offset: int) -> int:
+    """Index of the section holding the character at `offset`."""
+    return max(0, bisect_right(starts, offset) - 1)
@@ -0,0 +1,157 @@
+from pathlib import Path
+import threading
+import sqlite3
+
+
+# encodings of the full-dimension copies kept for rescoring
+RESCORE_PRECISIONS = ("float32", "float16", "int8")
+
+
+def truncate(embeddings: list[list[float]], dims: int | None) -> list[list[float]]:
+    """
+    Matryoshka-style truncation: keep the first `dims` components and L2-normalize
+    again. Only meaningful for models trained for it (e.g. text-embedding-3, nomic-embed).
+    """
+    import numpy as np
+
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    if not dims or dims >= vectors.shape[1]:
+        return embeddings
+
+    vectors = vectors[:, :dims]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.maximum(norms, 1e-12)).tolist()
+
+
+def calibrate_int8(embeddings: list[list[float]]) -> list[float]:
+    """Per-dimension scales mapping the observed range of each component onto [-127, 127]."""
+    import numpy as np
+
+    absmax = np.abs(np.asarray(embeddings, dtype=np.float32)).max(axis=0)
+    # leave headroom for values a little outside the calibration sample, they are clipped beyond it
+    return (np.maximum(absmax, 1e-6) * 1.25 / 127).tolist()
+
+
+def stored_precision(precision: str, scales: list[float] | None) -> str:
+    """The encoding of a collection's stored copies: int8 ones are float32 until calibrated."""
+    return "float32" if precision == "int8" and not scales else precision
+
+
+def encode(
+    embeddings: list[list[float]], precision: str, scales: list[float] | None = None
+) -> list[bytes]:
+    """Encode vectors in the given precision, one blob per vector."""
+    import numpy as np
+
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    if precision == "int8":
+        quantized = np.clip(np.rint(vectors / np.asarray(scales, dtype=np.float32)), -127, 127)
+        vectors = quantized.astype(np.int8)
+    elif precision == "float16":
+        vectors = vectors.astype(np.float16)
+
+    return [row.tobytes() for row in vectors]
+
+
+def decode(blobs: list[bytes], precision: str, scales: list[float] | None = None) -> "np.ndarray":
+    """Decode blobs written by `encode` back into a float32 matrix."""
+    import numpy as np
+
+    dtype = {"float32": np.float32, "float16": np.float16, "int8": np.int8}[precision]
+    vectors = np.stack([np.frombuffer(blob, dtype=dtype) for blob in blobs]).astype(np.float32)
+    if precision == "int8":
+        vectors *= np.asarray(scales, dtype=np.float32)
+    return vectors
+
+
+class VectorStore:
+    """
+    Compact full-dimension copies of the embeddings, in SQLite next to the database.
+
+    The vector index only holds what's needed to find candidates (possibly truncated);
+    these copies are read back for the few top candidates of a query to rescore them.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._lock, self.conn:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS vectors (
+                    collection TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (collection, id)
+                )
+                """
+            )
+
+    def put(self, collection_name: str, ids: list[str], blobs: list[bytes]) -> None:
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO vectors VALUES (?, ?, ?)",
+                [(collection_name, id_, blob) for id_, blob in zip(ids, blobs)],
+            )
+
+    def get(self, collection_name: str, ids: list[str]) -> dict[str, bytes]:
+        """The stored blobs of the given ids (missing ones are left out)."""
+        if not ids:
+            return {}
+
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT id, vector FROM vectors WHERE collection = ? AND id IN ({', '.join('?' * len(ids))})",
+                [collection_name, *ids],
+            ).fetchall()
+        return dict(rows)
+
+    def count(self, collection_name: str) -> int:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) FROM vectors WHERE collection = ?", (collection_name,)
+            ).fetchone()
+        return row[0]
+
+    def items(self, collection_name: str) -> dict[str, bytes]:
+        """Every stored blob of a collection, by id."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, vector FROM vectors WHERE collection = ?", (collection_name,)
+            ).fetchall()
+        return dict(rows)
+
+    def copy_document(self, source_name: str, target_name: str, file_hash: str) -> None:
+        """Copy the vectors of a document's chunks (ids `<hash>_<i>`) to another collection."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO vectors SELECT ?, id, vector FROM vectors "
+                "WHERE collection = ? AND id LIKE ?",
+                (target_name, source_name, f"{file_hash}_%"),
+            )
+
+    def delete_document(self, collection_name: str, file_hash: str) -> None:
+        """Delete the vectors of a document's chunks."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM vectors WHERE collection = ? AND id LIKE ?",
+                (collection_name, f"{file_hash}_%"),
+            )
+
+    def collection_names(self) -> list[str]:
+        with self._lock:
+            rows = self.conn.execute("SELECT DISTINCT collection FROM vectors").fetchall()
+        return [row[0] for row in rows]
+
+    def vacuum(self) -> None:
+        with self._lock:
+            self.conn.execute("VACUUM")
+
+    def drop_collection(self, collection_name: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM vectors WHERE collection = ?", (collection_name,))
+
+    def reset(self) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM vectors")
@@ -141,6 +141,84 @@ def blame(file_path: str, cwd: str | None = None) -> str:
         return f"Execution error: {str(e)}"
 
 
+def _run_git(args: list[str], cwd: str) -> str | None:
+    """Run a git command for internal use. Returns its output, or None if it failed."""
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            capture_output=True,
+            text=True,
+            cwd=cwd,
+        )
+    except Exception as e:
+        # git isn't installed or the directory is gone
+        logger.warning(f"Git command failed in {cwd}: {e}")
+        return None
+
+    if result.returncode != 0:
+        return None
+
+    return result.stdout
+
+
+def get_head_commit(cwd: str) -> str | None:
+    """Return the HEAD commit of the repository containing `cwd`, or None if there is none."""
+    output = _run_git(["rev-parse", "--verify", "--quiet", "HEAD"], cwd)
+    return output.strip() if output else None
+
+
+def list_files(cwd: str) -> list[str] | None:
+    """
+    Return the tracked and untracked (but not ignored) files below `cwd`,
+    relative to it. None if `cwd` is not inside a git repository.
+    """
+    output = _run_git(
+        ["ls-files", "-z", "--cached", "--others", "--exclude-standard"], cwd
+    )
+    if output is None:
+        return None
+
+    return sorted({path for path in output.split("\0") if path})
+
+
+def get_changed_files(since: str, cwd: str) -> dict[str, list[str]] | None:
+    """
+    Return the files below `cwd` that changed between the commit `since` and the
+    working tree, relative to `cwd`. None if git can't tell (e.g. unknown commit).
+
+    **format**: {"changed": [added, modified or renamed-to paths], "deleted": [deleted or renamed-from paths]}
+    """
+    output = _run_git(
+        ["diff", "--name-status", "-z", "-M", "--relative", since, "--", "."], cwd
+    )
+    untracked = _run_git(["ls-files", "-z", "--others", "--exclude-standard"], cwd)
+    if output is None or untracked is None:
+        return None
+
+    changed, deleted = set(), set()
+    fields = output.split("\0")
+    i = 0
+    while i < len(fields) and fields[i]:
+        status = fields[i]
+        if status[0] in ("R", "C"):
+            old_path, new_path = fields[i + 1], fields[i + 2]
+            if status[0] == "R":
+                deleted.add(old_path)
+            changed.add(new_path)
+            i += 3
+            continue
+
+        if status[0] == "D":
+            deleted.add(fields[i + 1])
+        else:
+            changed.add(fields[i + 1])
+        i += 2
+
+    changed.update(path for path in untracked.split("\0") if path)
+
+    return {"changed": sorted(changed), "deleted": sorted(deleted - changed)}
+
+
 GIT_TOOLS = [
     diff,
     blame,
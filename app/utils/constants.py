@@ -7,9 +7,79 @@ RECURSION_LIMIT = 100
 CHUNK_OVERLAP = 10
 CHUNK_SIZE = 50
 MAX_RESULTS = 20
+# bounds of the parent sections returned in place of the matched chunks (characters)
+PARENT_MAX_CHARS = 2000
+PARENT_MIN_CHARS = 200
+
+# near-duplicate chunks within a collection: MinHash signature size, LSH bands
+# (rows per band = permutations / bands) and the similarity above which a chunk is skipped
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+MINHASH_THRESHOLD = 0.9
 BATCH_SIZE = 30
 
+# batch sizes tried by `/embed --calibrate` and how many real chunks they are timed on
+CALIBRATION_BATCH_SIZES = [8, 16, 32, 64, 128, 256]
+CALIBRATION_SAMPLE_SIZE = 512
+
+# how long Ollama keeps the embedding model loaded after the last request
+OLLAMA_KEEP_ALIVE = "30m"
+
+# minimum cosine similarity expected between an optimized HF backend and the fp32 model
+HF_PARITY_THRESHOLD = 0.99
+# sequences per forward pass for local HF models (inputs are bucketed by token length)
+HF_BATCH_SIZE = 32
+# seconds bulk ingestion waits for its worker processes to load the model, and for
+# a batch to come back, before it gives up on them and embeds in-process
+HF_POOL_START_TIMEOUT = 300
+HF_POOL_TASK_TIMEOUT = 600
+
+# candidates fetched per requested result when a collection rescores at full dimension
+RESCORE_CANDIDATES = 4
+# full-dimension vectors an int8 collection keeps in float32 before calibrating its
+# scales on them (a few batches aren't representative of the component ranges)
+INT8_CALIBRATION_VECTORS = 1000
+
+# centroids summarizing each collection, and how much less similar to the query than
+# the best collection (cosine) a collection may be and still be searched
+ROUTING_CENTROIDS = 8
+ROUTING_MARGIN = 0.15
+
+# retrieval results cached in memory, and on disk across sessions (0 disables the disk tier)
+QUERY_CACHE_SIZE = 256
+QUERY_CACHE_DISK_SIZE = 5000
+
+# RAG queries shorter than this (in words) are treated as follow-ups and searched
+# together with the previous message (0 disables it)
+RAG_FOLLOW_UP_WORDS = 6
+
+# context window assumed for chat models when `context_window` isn't configured (tokens),
+# the share of it RAG context may fill each turn, and the passages retrieved to fill it
+DEFAULT_CONTEXT_WINDOW = 32768
+RAG_CONTEXT_SHARE = 0.15
+RAG_CANDIDATES = 10
+# chat models use their own tokenizers, the RAG budget is counted with this rough
+# characters-per-token ratio instead (about right for English with BPE tokenizers)
+CHARS_PER_TOKEN = 4
+
+# `/start_rag --compress`: best sentences kept per retrieved passage, with this many
+# neighbouring sentences on each side
+RAG_COMPRESSION_SENTENCES = 2
+RAG_COMPRESSION_NEIGHBOURS = 1
+
+# query latencies kept per collection for `/stats`
+LATENCY_SAMPLES = 1000
+# stored vectors used as queries to measure latency before and after `/compact`
+COMPACT_PROBE_QUERIES = 20
+
 LAST_N_TURNS = 20
+# `/start_rag --memory`: past turns older than the last `LAST_N_TURNS` recalled per message
+# from the conversation's memory, the characters of each turn kept, the turns kept per
+# conversation, and the days of inactivity after which `/compact` deletes a memory
+MEMORY_RECALL_TURNS = 3
+MEMORY_TURN_CHARS = 2000
+MEMORY_MAX_TURNS = 500
+MEMORY_RETENTION_DAYS = 30
 
 # Vibrant unified theme built around purple accent
 THEME = {
@@ -26,7 +96,8 @@ THEME = {
 }
 
 PROMPTS = {
-    "rag_results": "\n\nAnswer only from these documents. If irrelevant, say 'I don't know' unless user allows outside knowledge.\n",
+    "rag_results": "\n\nAnswer only from these documents. If irrelevant, say 'I don't know' unless user allows outside knowledge. Passages are tagged with their [n] source.\n",
+    "memory": "\n\nEarlier in this conversation (for reference, may be outdated):\n",
     "continue": "Continue where you left off. Don't repeat anything already done.",
 }
 
@@ -40,6 +40,10 @@ UI_MESSAGES = {
         "database_reset": "Database Reset",
         "reverting_model": "Reverting Model",
         "changed_session_id": "Changed Session ID",
+        "ingestion_estimate": "Ingestion Estimate (dry run)",
+        "collection_stats": "Collection '{}'",
+        "compaction": "Compaction",
+        "collection_compacted": "Collection '{}' compacted",
     },
     # Messages
     "messages": {
@@ -57,6 +61,10 @@ UI_MESSAGES = {
         "continuing_session": "Resuming from previous context...",
         "no_references": "No references available.",
         "rag_enabled": "Retrieval-Augmented Generation is now active.",
+        "rag_enabled_filtered": "Retrieval-Augmented Generation is now active, limited to: {}",
+        "compaction_started": "Compacting {} in the background. Queries keep working meanwhile, results are reported when done.",
+        "rag_compression": "Retrieved passages are cut down to their most relevant sentences.",
+        "rag_memory": "Turns of this conversation are embedded and recalled when relevant.",
         "rag_disabled": "Retrieval-Augmented Generation is now inactive.",
         "collections_header": "Collections available:",
         "collection_deleted": "Collection '{}' has been deleted.",
@@ -72,6 +80,14 @@ UI_MESSAGES = {
         "rag_features_disabled": "RAG features have been disabled due to errors.",
         "invalid_db_path": "Invalid directory path found in $ALLY_DATABASE_DIR environment variable. Reverting to default path.",
         "recursion_limit_reached": "Agent processing took longer than expected. Recursion limit reached.",
+        "calibration_no_sample": "No content found to calibrate the batch size on. Keeping the current batch size.",
+        "bundle_model_mismatch": "This bundle was embedded with {} / {}, which differs from the configured embedding model. Queries against it will not match well.",
+        "index_locked": "Collection '{}' already exists, its index parameters can't change. Keeping the current ones.",
+        "storage_locked": "Collection '{}' already holds vectors, its storage options can't change. Keeping the current ones.",
+        "bulk_mode_unsupported": "Bulk ingestion with worker processes is only available for Hugging Face models. Continuing with a single process.",
+        "ignored_arguments": "Ignoring unknown arguments: {}",
+        "compaction_running": "A compaction is already running. Wait for its results before starting another.",
+        "bulk_mode_failed": "The embedding worker processes could not be started. Continuing with a single process.",
     },
     # Errors
     "errors": {
@@ -93,6 +109,7 @@ UI_MESSAGES = {
         "invalid_directory_path": "Invalid directory path provided. Please use a valid file system path.",
         "directory_not_exist": "The specified directory does not exist. Please check the path.",
         "failed_scrape": "Failed to scrape file. Skipping. Check logs for details.",
+        "failed_read_archive": "Failed to read archive. Skipping. Check logs for details.",
         "collection_not_exist": "The specified collection does not exist in the database.",
         "failed_create_db_directory": "Failed to create database directory. Check file system permissions.",
         "failed_save_indexed": "Failed to save indexed collections metadata. Check logs for details.",
@@ -107,27 +124,38 @@ UI_MESSAGES = {
         "no_messages_returned": "Agent did not return any messages. Check logs for details.",
         "model_not_found": "Model not found or not supported. Verify the model name is correct.",
         "collection_name_too_short": "Collection name must be at least 3 characters long.",
+        "invalid_option_value": "Invalid value for option '{}'.",
+        "invalid_filter": "Invalid filter '{}'. Use path=<glob>, type=<extensions> or since=<YYYY-MM-DD>.",
+        "invalid_bundle": "Failed to read the bundle. Make sure it was created with /export. Check logs for details.",
     },
     # Confirmations
     "confirmations": {
         "continue_from_left_off": "Continue from where the agent left off?",
         "continue_anyway": "Something went wrong during the brainstorming process. Do you wish to continue anyway?",
         "delete_collection": "Are you sure you want to delete the collection '{}'?",
+        "replace_collection": "Collection '{}' already exists. Replace it with the imported one?",
         "reset_database": "Are you sure you want to reset the database? This action cannot be undone.",
         "change_model": "Do you want to enter in the name of a different model?",
     },
     # Usage Messages
     "usage": {
-        "embed": "Usage: /embed 'directory_path' 'collection_name'",
+        "embed": "Usage: /embed [--dry-run] 'directory_path' 'collection_name' [--workers N] [--calibrate] [--dims N] [--rescore float32|float16|int8] [--space l2|cosine|ip] [--m N] [--ef-construction N] [--ef-search N]",
+        "start_rag": "Usage: /start_rag [--compress] [--memory] [--where path=docs/** type=pdf,md since=2026-01-01]",
         "index": "Usage: /index 'collection_name'",
         "unindex": "Usage: /unindex 'collection_name'",
         "delete": "Usage: /delete 'collection_name'",
+        "export": "Usage: /export 'collection_name' 'file_path'",
+        "import": "Usage: /import 'file_path' ['collection_name']",
     },
     # Success Messages
     "success": {
         "collection_indexed": "Collection '{}' is now indexed.",
         "collection_unindexed": "Collection '{}' is now unindexed.",
         "documents_embedded": "Documents from '{}' have been embedded into collection '{}'.",
+        "collection_exported": "Collection '{}' ({} chunks) exported to '{}'.",
+        "collection_imported": "Imported {} chunks into collection '{}'.",
+        "database_compacted": "Reclaimed {} left behind by deleted collections.",
+        "batch_size_calibrated": "Embedding batch size set to {} ({:.1f} chunks/s). It will be reused on later runs.",
     },
     # Help Content
     "help": {
@@ -154,17 +182,63 @@ UI_MESSAGES = {
             "| Command | Description |",
             "|---------|-------------|",
             "| /start_rag | Enable RAG functionality |",
+            "| /start_rag --where `path=docs/** type=pdf since=2026-01-01` | Enable RAG limited to matching files |",
+            "| /start_rag --compress | Enable RAG, keeping only the most relevant sentences of each passage |",
+            "| /start_rag --memory | Enable RAG, also recalling older turns of the conversation |",
             "| /stop_rag | Disable RAG functionality |",
             "| /embed `<path>` `<collection>` | Embed documents into collection |",
+            "| /embed `<path>` `<collection>` --workers `N` | Bulk-embed with N worker processes (Hugging Face) |",
+            "| /embed `<path>` `<collection>` --calibrate | Tune the embedding batch size on these documents first |",
+            "| /embed `<path>` `<collection>` --dims `N` | Store vectors truncated to N dimensions in a new collection (Matryoshka models) |",
+            "| /embed `<path>` `<collection>` --rescore `float16\\|int8` | Keep compact full vectors to rescore the top candidates |",
+            "| /embed `<path>` `<collection>` --space, --m, --ef-construction, --ef-search | HNSW index parameters of a new collection |",
+            "| /embed --dry-run `<path>` `<collection>` | Estimate files, chunks, tokens, time and cost without embedding |",
             "| /refs, /references | Show latest references |",
             "| /index `<collection>` | Index a collection for RAG |",
             "| /unindex `<collection>` | Unindex a collection |",
             "| /list | List all collections |",
+            "| /stats [`<collection>`] | Show size, content and query latency statistics |",
+            "| /compact [`<collection>`] | Drop orphaned chunks, rebuild the vector index and reclaim disk space |",
             "| /delete `<collection>` | Delete a collection |",
+            "| /export `<collection>` `<file>` | Export a collection with its embeddings to a bundle |",
+            "| /import `<file>` [`<collection>`] | Import a bundle without re-embedding |",
             "| /purge | Reset database (delete all collections) |",
         ],
         "model_suffix": "Model: **{}**",
     },
+    # Ingestion Estimates
+    "estimate": {
+        "files": "• Files: {} ({})",
+        "changed": "• To embed: {} new or changed files ({}), {} unchanged",
+        "chunks": "• Chunks: {} (~{} tokens)",
+        "linked": "• Duplicates of stored content (linked without embedding): {}",
+        "failed": "• Unreadable files (would be skipped): {}",
+        "time": "• Estimated time: {}",
+        "time_unknown": "• Estimated time: unknown (run /embed with --calibrate once to measure throughput)",
+        "cost": "• Estimated cost: ${:.4f}",
+        "cost_unknown": "• Estimated cost: unknown for this provider",
+    },
+    # Collection Statistics
+    "stats": {
+        "status": "• Status: {}",
+        "content": "• Chunks: {} from {} documents ({} files)",
+        "aliases": "• Near-duplicate chunks skipped: {}",
+        "chunk_length": "• Average chunk length: {:.0f} characters",
+        "model": "• Embedding model: {} / {} ({} dimensions)",
+        "index": "• Index parameters: {}",
+        "storage": "• Vector storage: {} dimensions in the index, rescoring: {}",
+        "size": "• Vector index on disk: {} (text: {})",
+        "last_ingest": "• Last ingest: {}",
+        "latency": "• Query latency: p50 {}, p95 {}, p99 {} (last {} queries)",
+        "latency_unknown": "• Query latency: no queries recorded yet",
+    },
+    # Compaction reports
+    "compaction": {
+        "cleanup": "• Removed {} missing files and {} orphaned chunks ({} chunks left)",
+        "size": "• Vector index on disk: {} → {}",
+        "latency": "• Query latency (median of {} probes): {} → {}",
+        "latency_unknown": "• Query latency: the collection is empty",
+    },
     # Tool Messages
     "tool": {
         "title": "## {}",